@@ -0,0 +1,266 @@
+import json
+import multiprocessing
+import os
+import re
+import threading
+import time
+import uuid
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from .cid_index import cid_index
+from .ipfs_utils import load_from_ipfs
+from .metrics import observe, inc
+from .pdf_utils import render_document
+from .predictions import parse_predictions
+from .session_store import PredictionSession
+from .upload_queue import upload_queue
+
+cache_dir = os.getenv("CACHE_DIR", "cache")
+EXPORT_DIR = os.path.join(cache_dir, "exports")
+# Render processes per web worker; defaults to the cores split between the web workers
+EXPORT_WORKERS = int(os.getenv("EXPORT_WORKERS", "0")) or max(
+    (os.cpu_count() or 1) // max(int(os.getenv("WEB_CONCURRENCY", "1")), 1), 1)
+EXPORT_FETCH_WORKERS = int(os.getenv("EXPORT_FETCH_WORKERS", "16"))
+EXPORT_RETENTION_SECONDS = int(os.getenv("EXPORT_RETENTION_SECONDS", str(24 * 3600)))
+# A running job touches its state file this often; one untouched for EXPORT_STALE_SECONDS
+# belongs to a worker that died, and is reported as failed
+EXPORT_HEARTBEAT_SECONDS = float(os.getenv("EXPORT_HEARTBEAT_SECONDS", "5"))
+EXPORT_STALE_SECONDS = float(os.getenv("EXPORT_STALE_SECONDS", "30"))
+MAX_EXPORT_USERS = int(os.getenv("MAX_EXPORT_USERS", "10000"))
+
+_JOB_ID = re.compile(r"^[0-9a-f]{32}$")
+# How often a running job's progress file is rewritten
+_STATE_WRITE_SECONDS = 0.5
+
+
+def participant_table(snapshot, predictions_by_matchday: dict):
+    """A user's predicted table: the real results with their predictions applied, as /predict would."""
+    session = PredictionSession(dict(snapshot.real_results), league_table=snapshot.new_table())
+    updates = {}
+    for matchday, predictions in (predictions_by_matchday or {}).items():
+        matchday = str(matchday)
+        if matchday in snapshot.fixtures_by_day and not snapshot.day_complete[matchday] and isinstance(predictions, dict):
+            updates.update(parse_predictions(snapshot.fixtures_by_day[matchday], predictions))
+    return session.set_results(updates)
+
+
+def _archive_name(league: str, username: str, taken: set) -> str:
+    base = f"{league}_{re.sub(r'[^A-Za-z0-9_.-]', '_', username) or 'user'}"
+    name, n = f"{base}.pdf", 1
+    while name in taken:
+        n += 1
+        name = f"{base}_{n}.pdf"
+    taken.add(name)
+    return name
+
+
+class _AppendOnly:
+    """File wrapper without tell/seek, so zipfile streams entries (data descriptors) and never rewrites."""
+
+    def __init__(self, f):
+        self._f = f
+
+    def write(self, data):
+        return self._f.write(data)
+
+    def flush(self):
+        self._f.flush()
+
+
+class BulkExporter:
+    """
+    Bulk PDF export jobs.
+
+    A job loads every participant's pinned predictions, rebuilds their
+    predicted table from the league snapshot, and renders the PDFs on a
+    shared process pool. Finished documents are appended to a zip on disk as
+    they complete, so the archive can be streamed while the job is still
+    running. Progress and per-document render times live in a JSON file next
+    to the zip, which lets any worker process report on or stream any job.
+    The owning worker keeps that file's mtime fresh while the job runs, so a
+    job whose worker died is reported as failed instead of running forever.
+    """
+
+    def __init__(self, directory=EXPORT_DIR, workers=EXPORT_WORKERS):
+        self._dir = directory
+        self._workers = workers
+        self._pool = None
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # spawn: forking a process that runs threads and an event loop isn't safe
+                self._pool = ProcessPoolExecutor(self._workers, mp_context=multiprocessing.get_context("spawn"))
+            return self._pool
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+    def zip_path(self, job_id: str) -> str:
+        return os.path.join(self._dir, f"{job_id}.zip")
+
+    def _state_path(self, job_id: str) -> str:
+        return os.path.join(self._dir, f"{job_id}.json")
+
+    def start(self, snapshot, usernames=None) -> dict:
+        """Queue an export of `usernames` (default: everyone with saved predictions)."""
+        league = snapshot.league
+        if usernames is None:
+            suffix = f"_{league}_all_predictions"
+            names = set(cid_index.latest_matching(suffix)) | set(upload_queue.pending_matching(suffix))
+            usernames = sorted(name[:-len(suffix)] for name in names)
+        usernames = list(dict.fromkeys(usernames))  # drop duplicates, keep order
+        if len(usernames) > MAX_EXPORT_USERS:
+            raise ValueError(f"At most {MAX_EXPORT_USERS} users per export.")
+
+        self._sweep()
+        job_id = uuid.uuid4().hex
+        state = {
+            "id": job_id, "league": league, "status": "queued", "pid": os.getpid(),
+            "total": len(usernames), "completed": 0, "failed": {},
+            "documents": [], "created_at": time.time(), "started_at": None, "finished_at": None,
+        }
+        open(self.zip_path(job_id), "wb").close()
+        self._write_state(state)
+        threading.Thread(target=self._run, args=(state, snapshot, usernames),
+                         name=f"pdf-export-{job_id[:8]}", daemon=True).start()
+        return state
+
+    def status(self, job_id: str):
+        """Job state with summary timings, or None for an unknown job."""
+        if not _JOB_ID.match(job_id):
+            return None
+        path = self._state_path(job_id)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            heartbeat = os.path.getmtime(path)
+        except (FileNotFoundError, ValueError):
+            return None
+        if state["status"] in ("queued", "running") and time.time() - heartbeat > EXPORT_STALE_SECONDS:
+            state["status"] = "failed"
+            state["error"] = f"export worker {state.get('pid')} stopped responding"
+            state["finished_at"] = heartbeat
+        times = [doc["render_ms"] for doc in state["documents"]]
+        end = state["finished_at"] or time.time()
+        state["progress"] = round((state["completed"] + len(state["failed"])) / state["total"], 4) if state["total"] else 1.0
+        state["elapsed_seconds"] = round(end - state["started_at"], 3) if state["started_at"] else 0.0
+        state["mean_render_ms"] = round(sum(times) / len(times), 1) if times else None
+        state["max_render_ms"] = max(times) if times else None
+        return state
+
+    def iter_zip(self, job_id: str, chunk_size=64 * 1024):
+        """Yield the archive's bytes, following the file until the job finishes."""
+        with open(self.zip_path(job_id), "rb") as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if chunk:
+                    yield chunk
+                    continue
+                state = self.status(job_id)
+                if state is None or state["status"] in ("done", "failed"):
+                    rest = f.read()
+                    while rest:
+                        yield rest
+                        rest = f.read(chunk_size)
+                    return
+                time.sleep(0.2)
+
+    def _run(self, state: dict, snapshot, usernames: list):
+        league = snapshot.league
+        state["status"] = "running"
+        state["started_at"] = time.time()
+        self._write_state(state)
+        stop = threading.Event()
+        threading.Thread(target=self._heartbeat, args=(state["id"], stop),
+                         name=f"pdf-export-heartbeat-{state['id'][:8]}", daemon=True).start()
+        try:
+            with open(self.zip_path(state["id"]), "wb") as f, \
+                    zipfile.ZipFile(_AppendOnly(f), "w", zipfile.ZIP_STORED) as archive:
+                self._render_all(state, snapshot, usernames, archive)
+            state["status"] = "done"
+        except Exception as e:
+            print(f"PDF export {state['id']} failed: {e}")
+            state["status"] = "failed"
+            state["error"] = str(e)
+        finally:
+            stop.set()
+        state["finished_at"] = time.time()
+        self._write_state(state)
+        inc("pdf_exports_total", outcome=state["status"])
+        print(f"PDF export {state['id']} ({league}): {state['completed']} rendered, "
+              f"{len(state['failed'])} failed in {state['finished_at'] - state['started_at']:.1f}s")
+
+    def _render_all(self, state, snapshot, usernames, archive):
+        league = snapshot.league
+
+        def fetch(username):
+            name = f"{username}_{league}_all_predictions"
+            data = upload_queue.pending(name)
+            if data is None and (cid := cid_index.latest(name)):
+                data = load_from_ipfs(cid)
+            return data
+
+        # Jobs are interleaved on the pool, so submit as predictions arrive
+        pool = self._get_pool()
+        futures = {}
+        with ThreadPoolExecutor(EXPORT_FETCH_WORKERS) as fetchers:
+            for username, data in zip(usernames, fetchers.map(fetch, usernames)):
+                predictions = (data or {}).get("predictions")
+                if not predictions:
+                    state["failed"][username] = "no saved predictions"
+                    continue
+                table = participant_table(snapshot, predictions)
+                futures[pool.submit(render_document, table, predictions, username, league)] = username
+
+        taken, last_write = set(), 0.0
+        for future in as_completed(futures):
+            username = futures[future]
+            try:
+                pdf, seconds = future.result()
+            except Exception as e:
+                state["failed"][username] = f"render failed: {e}"
+                continue
+            archive.writestr(_archive_name(league, username, taken), pdf)
+            observe("pdf_export_render_seconds", seconds)
+            state["completed"] += 1
+            state["documents"].append({
+                "username": username, "render_ms": round(seconds * 1000, 1), "bytes": len(pdf),
+            })
+            if time.time() - last_write >= _STATE_WRITE_SECONDS:
+                self._write_state(state)
+                last_write = time.time()
+
+    def _heartbeat(self, job_id: str, stop: threading.Event):
+        path = self._state_path(job_id)
+        while not stop.wait(EXPORT_HEARTBEAT_SECONDS):
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+
+    def _write_state(self, state: dict):
+        path = self._state_path(state["id"])
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    def _sweep(self):
+        """Delete exports older than EXPORT_RETENTION_SECONDS."""
+        cutoff = time.time() - EXPORT_RETENTION_SECONDS
+        for name in os.listdir(self._dir):
+            path = os.path.join(self._dir, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
+
+
+bulk_exporter = BulkExporter()
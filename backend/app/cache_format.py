@@ -0,0 +1,158 @@
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+
+# Binary fixture cache, little-endian:
+#   header   magic, schema version, reserved, written_at, payload length, crc32(payload)
+#   payload  string table (u32 count, then u16 length + utf-8 bytes each)
+#            fixtures (u32 count, then one fixed-size record each)
+# Team names, matchday keys and dates are stored once in the string table;
+# fixtures refer to them by index. Matchdays come back in file order.
+MAGIC = b"UFXC"
+SCHEMA_VERSION = 1
+_HEADER = struct.Struct("<4sHHdII")
+_COUNT = struct.Struct("<I")
+_LENGTH = struct.Struct("<H")
+# matchday, home, away, date (string indices), home_score, away_score, played
+_FIXTURE = struct.Struct("<HHHHhh?")
+_NONE = 0xFFFF
+_MAX_STRINGS = 0xFFFF
+
+
+class CacheFormatError(ValueError):
+    """The file is not a readable fixture cache (wrong magic/version, truncated, bad checksum)."""
+
+
+def encode(matches_by_day: dict, timestamp: float = None) -> bytes:
+    strings, index = [], {}
+
+    def intern(value):
+        if value is None:
+            return _NONE
+        if value not in index:
+            if len(strings) == _MAX_STRINGS:
+                raise CacheFormatError("too many distinct strings")
+            index[value] = len(strings)
+            strings.append(value)
+        return index[value]
+
+    records = []
+    for day, games in matches_by_day.items():
+        day_id = intern(str(day))
+        for m in games:
+            played = bool(m.get("played"))
+            home_score, away_score = m.get("home_score"), m.get("away_score")
+            records.append(_FIXTURE.pack(
+                day_id, intern(m["home"]), intern(m["away"]), intern(m.get("date")),
+                -1 if home_score is None else home_score,
+                -1 if away_score is None else away_score,
+                played,
+            ))
+
+    parts = [_COUNT.pack(len(strings))]
+    for value in strings:
+        raw = value.encode("utf-8")
+        parts.append(_LENGTH.pack(len(raw)))
+        parts.append(raw)
+    parts.append(_COUNT.pack(len(records)))
+    parts.extend(records)
+    payload = b"".join(parts)
+
+    header = _HEADER.pack(MAGIC, SCHEMA_VERSION, 0, timestamp or time.time(),
+                          len(payload), zlib.crc32(payload))
+    return header + payload
+
+
+def read_header(buffer):
+    """(schema_version, written_at, payload_length, crc32); only the header is read."""
+    if len(buffer) < _HEADER.size:
+        raise CacheFormatError("truncated header")
+    magic, version, _, written_at, length, checksum = _HEADER.unpack_from(buffer)
+    if magic != MAGIC:
+        raise CacheFormatError("not a fixture cache")
+    if version != SCHEMA_VERSION:
+        raise CacheFormatError(f"unsupported schema version {version}")
+    return version, written_at, length, checksum
+
+
+def decode(buffer) -> dict:
+    _, _, length, checksum = read_header(buffer)
+    payload = memoryview(buffer)[_HEADER.size:_HEADER.size + length]
+    try:
+        if len(payload) != length:
+            raise CacheFormatError("truncated payload")
+        if zlib.crc32(payload) != checksum:
+            raise CacheFormatError("checksum mismatch")
+
+        offset = 0
+        (count,) = _COUNT.unpack_from(payload, offset)
+        offset += _COUNT.size
+        strings = []
+        for _ in range(count):
+            (size,) = _LENGTH.unpack_from(payload, offset)
+            offset += _LENGTH.size
+            strings.append(str(payload[offset:offset + size], "utf-8"))
+            offset += size
+
+        (count,) = _COUNT.unpack_from(payload, offset)
+        offset += _COUNT.size
+        if len(payload) - offset != count * _FIXTURE.size:
+            raise CacheFormatError("fixture section has the wrong size")
+
+        matches_by_day = {}
+        for day_id, home, away, date, home_score, away_score, played in _FIXTURE.iter_unpack(payload[offset:]):
+            matches_by_day.setdefault(strings[day_id], []).append({
+                "home": strings[home], "away": strings[away],
+                "home_score": home_score if played else None,
+                "away_score": away_score if played else None,
+                "played": played, "date": None if date == _NONE else strings[date]
+            })
+        return matches_by_day
+    except (struct.error, IndexError, UnicodeDecodeError) as e:
+        raise CacheFormatError(f"corrupt payload: {e}") from e
+    finally:
+        payload.release()
+
+
+def load(path: str) -> dict:
+    """Memory-map and decode a cache file. Raises OSError or CacheFormatError."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size < _HEADER.size:
+            raise CacheFormatError("truncated header")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return decode(mapped)
+
+
+def written_at(path: str) -> float:
+    """Write time recorded in the header, reading only the header bytes."""
+    with open(path, "rb") as f:
+        return read_header(f.read(_HEADER.size))[1]
+
+
+def save(matches_by_day: dict, path: str, timestamp: float = None):
+    """Write atomically: a crash leaves either the old file or the new one."""
+    _atomic_write(path, encode(matches_by_day, timestamp))
+
+
+def save_json(data, path: str):
+    _atomic_write(path, json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+
+def _atomic_write(path: str, blob: bytes):
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(blob)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
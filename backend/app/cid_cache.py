@@ -0,0 +1,142 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+from .metrics import register_collector
+
+cache_dir = os.getenv("CACHE_DIR", "cache")
+CID_CACHE_DIR = os.path.join(cache_dir, "ipfs")
+CID_CACHE_MEMORY_BYTES = int(os.getenv("CID_CACHE_MEMORY_BYTES", str(32 * 1024 * 1024)))
+CID_CACHE_DISK_BYTES = int(os.getenv("CID_CACHE_DISK_BYTES", str(512 * 1024 * 1024)))
+
+
+class ContentCache:
+    """
+    Content-addressed cache for IPFS blobs, keyed by CID.
+
+    A CID names immutable content, so entries are never revalidated; they only
+    leave the cache through size-bounded LRU eviction. Blobs are kept as JSON
+    bytes in a memory tier, backed by a sharded on-disk tier.
+    """
+
+    def __init__(self, directory=CID_CACHE_DIR, memory_bytes=CID_CACHE_MEMORY_BYTES,
+                 disk_bytes=CID_CACHE_DISK_BYTES):
+        self._dir = directory
+        self._memory_limit = memory_bytes
+        self._disk_limit = disk_bytes
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()  # cid -> bytes
+        self._memory_size = 0
+        self._disk = OrderedDict()    # cid -> size on disk
+        self._disk_size = 0
+        self._counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+        os.makedirs(directory, exist_ok=True)
+        self._scan_disk()
+
+    def get(self, cid: str):
+        """Return the cached dict for `cid`, or None."""
+        with self._lock:
+            blob = self._memory.get(cid)
+            if blob is not None:
+                self._memory.move_to_end(cid)
+                self._counters["memory_hits"] += 1
+                return json.loads(blob)
+
+            if cid in self._disk:
+                try:
+                    with open(self._path(cid), "rb") as f:
+                        blob = f.read()
+                except OSError:
+                    self._drop_disk(cid)
+                else:
+                    self._disk.move_to_end(cid)
+                    self._counters["disk_hits"] += 1
+                    self._remember(cid, blob)
+                    return json.loads(blob)
+
+            self._counters["misses"] += 1
+            return None
+
+    def put(self, cid: str, data: dict):
+        blob = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        with self._lock:
+            self._remember(cid, blob)
+            if cid not in self._disk:
+                self._write_disk(cid, blob)
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits = self._counters["memory_hits"] + self._counters["disk_hits"]
+            lookups = hits + self._counters["misses"]
+            return {
+                **self._counters,
+                "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_size,
+                "disk_entries": len(self._disk),
+                "disk_bytes": self._disk_size,
+            }
+
+    def _path(self, cid: str) -> str:
+        return os.path.join(self._dir, cid[-2:], f"{cid}.json")
+
+    def _scan_disk(self):
+        entries = []
+        for root, _, files in os.walk(self._dir):
+            for name in files:
+                if name.endswith(".json"):
+                    st = os.stat(os.path.join(root, name))
+                    entries.append((st.st_mtime, name[:-5], st.st_size))
+        for _, cid, size in sorted(entries):
+            self._disk[cid] = size
+            self._disk_size += size
+
+    def _remember(self, cid: str, blob: bytes):
+        if len(blob) > self._memory_limit:
+            return
+        old = self._memory.pop(cid, None)
+        if old is not None:
+            self._memory_size -= len(old)
+        self._memory[cid] = blob
+        self._memory_size += len(blob)
+        while self._memory_size > self._memory_limit:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_size -= len(evicted)
+
+    def _write_disk(self, cid: str, blob: bytes):
+        path = self._path(cid)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(blob)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Could not write CID cache entry {cid}: {e}")
+            return
+        self._disk[cid] = len(blob)
+        self._disk_size += len(blob)
+        while self._disk_size > self._disk_limit and self._disk:
+            self._drop_disk(next(iter(self._disk)))
+
+    def _drop_disk(self, cid: str):
+        self._disk_size -= self._disk.pop(cid, 0)
+        try:
+            os.remove(self._path(cid))
+        except FileNotFoundError:
+            pass
+
+
+cid_cache = ContentCache()
+
+
+@register_collector
+def _cid_cache_metrics():
+    stats = cid_cache.stats()
+    for tier in ("memory", "disk"):
+        yield ("ipfs_cache_hits_total", "counter", "IPFS content cache hits by tier.",
+               {"tier": tier}, stats[f"{tier}_hits"])
+    yield ("ipfs_cache_misses_total", "counter", "IPFS content cache misses.", {}, stats["misses"])
+    for tier in ("memory", "disk"):
+        yield ("ipfs_cache_bytes", "gauge", "Bytes held by the IPFS content cache.",
+               {"tier": tier}, stats[f"{tier}_bytes"])
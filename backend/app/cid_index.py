@@ -0,0 +1,161 @@
+import json
+import os
+import sqlite3
+import threading
+
+cache_dir = os.getenv("CACHE_DIR", "cache")
+CID_INDEX_PATH = os.path.join(cache_dir, "cids.sqlite3")
+LEGACY_CID_STORE_PATH = os.path.join(cache_dir, "cids.json")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cid_latest (
+    name TEXT PRIMARY KEY,
+    cid TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    content_hash TEXT
+);
+CREATE TABLE IF NOT EXISTS cid_history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    cid TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    content_hash TEXT
+);
+CREATE INDEX IF NOT EXISTS cid_history_name ON cid_history (name, id);
+"""
+
+# Columns added after the first release, created on open if missing
+ADDED_COLUMNS = [
+    ("cid_latest", "content_hash", "TEXT"),
+    ("cid_history", "content_hash", "TEXT"),
+]
+
+
+class CIDIndex:
+    """
+    SQLite-backed name -> CID index.
+
+    `cid_latest` gives point lookups and upserts for the current CID of a name;
+    `cid_history` keeps every CID a name has pointed to. WAL mode lets several
+    workers read while one writes, and each upload is a single transaction.
+    """
+
+    def __init__(self, path=CID_INDEX_PATH, legacy_json_path=LEGACY_CID_STORE_PATH):
+        self._path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = self._conn()
+        conn.executescript(SCHEMA)
+        for table, column, kind in ADDED_COLUMNS:
+            columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+            if column not in columns:
+                try:
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {kind}")
+                except sqlite3.OperationalError:
+                    pass  # another worker added it first
+        self._migrate_json(legacy_json_path)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self._path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def record(self, name: str, cid: str, timestamp: str, content_hash: str = None):
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT INTO cid_history (name, cid, timestamp, content_hash) VALUES (?, ?, ?, ?)",
+                (name, cid, timestamp, content_hash),
+            )
+            conn.execute(
+                "INSERT INTO cid_latest (name, cid, timestamp, content_hash) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET cid = excluded.cid, timestamp = excluded.timestamp, "
+                "content_hash = excluded.content_hash",
+                (name, cid, timestamp, content_hash),
+            )
+
+    def latest(self, name: str):
+        row = self._conn().execute(
+            "SELECT cid FROM cid_latest WHERE name = ?", (name,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def latest_with_hash(self, name: str):
+        """(cid, content_hash) currently recorded for a name, or (None, None)."""
+        row = self._conn().execute(
+            "SELECT cid, content_hash FROM cid_latest WHERE name = ?", (name,)
+        ).fetchone()
+        return tuple(row) if row else (None, None)
+
+    def find(self, name: str, content_hash: str):
+        """Most recent CID pinned for `name` with this content hash, or None."""
+        row = self._conn().execute(
+            "SELECT cid FROM cid_history WHERE name = ? AND content_hash = ? ORDER BY id DESC LIMIT 1",
+            (name, content_hash),
+        ).fetchone()
+        return row[0] if row else None
+
+    def history(self, name: str) -> list:
+        rows = self._conn().execute(
+            "SELECT cid, timestamp FROM cid_history WHERE name = ? ORDER BY id DESC", (name,)
+        ).fetchall()
+        return [{"cid": cid, "timestamp": ts} for cid, ts in rows]
+
+    def names(self, suffix: str = "") -> list:
+        return sorted(self.latest_matching(suffix))
+
+    def latest_matching(self, suffix: str = "") -> dict:
+        """{name: cid} for every name ending in `suffix`, in one query."""
+        rows = self._conn().execute(
+            "SELECT name, cid FROM cid_latest WHERE name LIKE ? ESCAPE '\\'",
+            ("%" + suffix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_"),),
+        ).fetchall()
+        return dict(rows)
+
+    def all(self) -> dict:
+        rows = self._conn().execute("SELECT name, cid, timestamp FROM cid_latest").fetchall()
+        return {name: {"cid": cid, "timestamp": ts} for name, cid, ts in rows}
+
+    def _migrate_json(self, legacy_json_path: str):
+        """One-time import of the old whole-file cids.json store."""
+        if not os.path.exists(legacy_json_path):
+            return
+
+        conn = self._conn()
+        with conn:
+            # Take the write lock first so concurrent workers migrate only once
+            conn.execute("BEGIN IMMEDIATE")
+            if not os.path.exists(legacy_json_path):
+                return
+            try:
+                with open(legacy_json_path, "r") as f:
+                    legacy = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                print(f"Warning: Could not parse {legacy_json_path}, skipping migration")
+                return
+
+            for name, stored in legacy.items():
+                if isinstance(stored, dict):
+                    cid, ts = stored.get("cid"), stored.get("timestamp", "")
+                else:
+                    cid, ts = stored, ""  # Backward compatibility
+                if not cid:
+                    continue
+                conn.execute(
+                    "INSERT INTO cid_history (name, cid, timestamp) VALUES (?, ?, ?)",
+                    (name, cid, ts),
+                )
+                conn.execute(
+                    "INSERT OR IGNORE INTO cid_latest (name, cid, timestamp) VALUES (?, ?, ?)",
+                    (name, cid, ts),
+                )
+            os.replace(legacy_json_path, legacy_json_path + ".migrated")
+        print(f"Migrated {len(legacy)} CIDs from {legacy_json_path}")
+
+
+cid_index = CIDIndex()
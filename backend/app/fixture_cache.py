@@ -0,0 +1,265 @@
+import asyncio
+import os
+import threading
+import time
+
+FIXTURE_CACHE_TTL = int(os.getenv("FIXTURE_CACHE_TTL", "300"))
+# How often a passive cache checks whether the on-disk copy was rewritten
+SOURCE_CHECK_SECONDS = float(os.getenv("FIXTURE_SOURCE_CHECK_SECONDS", "2"))
+
+
+class _Flight:
+    """One in-progress load; sync callers wait on the event, async ones on futures."""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self._waiters = []
+
+    def wait_async(self):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._waiters.append((loop, future))
+        return future
+
+    def finish(self):
+        self.event.set()
+        for loop, future in self._waiters:
+            loop.call_soon_threadsafe(_resolve, future)
+
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class FixtureCache:
+    """
+    In-process fixture cache in front of the scrapers.
+
+    Fresh entries are served straight from memory. Stale entries are served
+    immediately while a single background thread per league revalidates them
+    (stale-while-revalidate). Cold misses block, but only one caller per league
+    runs the loader; everyone else waits for its result (single-flight).
+    `aget`/`arefresh` are the event-loop variants and share the same flights.
+
+    In passive mode (set while the refresh scheduler owns freshness) entries
+    never go stale and cold misses only use `cache_only_loader`, so a request
+    can never trigger a scrape. If `source_stamp` is given, a passive cache
+    also polls it (at most every SOURCE_CHECK_SECONDS per league) and reloads
+    cache-only in the background when it changes, which is how workers that
+    don't run the scheduler pick up what the scheduling worker scraped.
+
+    If `build` is given, loaded data is passed through `build(league, data)`
+    once, off the request path, and the result is what the cache serves.
+
+    Listeners added with `add_listener(fn)` are called as
+    `fn(league, old, new)` after an entry is replaced, from whichever thread
+    ran the load; they must be quick and must not raise.
+    """
+
+    def __init__(self, loader, async_loader=None, cache_only_loader=None, build=None,
+                 source_stamp=None, ttl_seconds=FIXTURE_CACHE_TTL, source_check_seconds=SOURCE_CHECK_SECONDS):
+        # loader(league, force_refresh) -> matches_by_day
+        # async_loader(league, force_refresh) -> awaitable matches_by_day
+        # cache_only_loader(league) -> matches_by_day from local/IPFS caches only
+        # source_stamp(league) -> value that changes whenever the on-disk cache is rewritten
+        self._loader = loader
+        self._async_loader = async_loader
+        self._cache_only_loader = cache_only_loader
+        self._build = build
+        self._source_stamp = source_stamp
+        self.passive = False
+        self._ttl = ttl_seconds
+        self._source_check = source_check_seconds
+        self._lock = threading.Lock()
+        self._entries = {}      # league -> (data, loaded_at)
+        self._stamps = {}       # league -> (source stamp at load, last checked)
+        self._inflight = {}     # league -> _Flight
+        self._listeners = []
+        self._counters = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "refreshes": 0,
+            "refresh_errors": 0,
+        }
+
+    def get(self, league: str):
+        """
+        Return fixtures for a league, revalidating in the background when stale.
+        None if nothing could be loaded.
+        """
+        with self._lock:
+            data = self._lookup(league)
+            if data is not None:
+                return data
+            self._counters["misses"] += 1
+            flight, owner = self._join_flight(league)
+
+        if owner:
+            self._run_refresh(league, False, cache_only=self.passive)
+        else:
+            flight.event.wait()
+        return self.peek(league)
+
+    def refresh(self, league: str, force_refresh: bool = True):
+        """Reload now (a forced scrape by default). Concurrent callers share one loader run."""
+        with self._lock:
+            flight, owner = self._join_flight(league)
+
+        if owner:
+            self._run_refresh(league, force_refresh)
+        else:
+            flight.event.wait()
+        return self.peek(league)
+
+    async def aget(self, league: str):
+        """Event-loop variant of `get`; waiting never blocks the loop."""
+        with self._lock:
+            data = self._lookup(league)
+            if data is not None:
+                return data
+            self._counters["misses"] += 1
+            flight, owner = self._join_flight(league)
+            waiter = None if owner else flight.wait_async()
+
+        if owner:
+            await self._arun_refresh(league, False, cache_only=self.passive)
+        else:
+            await waiter
+        return self.peek(league)
+
+    async def arefresh(self, league: str, force_refresh: bool = True):
+        """Event-loop variant of `refresh`."""
+        with self._lock:
+            flight, owner = self._join_flight(league)
+            waiter = None if owner else flight.wait_async()
+
+        if owner:
+            await self._arun_refresh(league, force_refresh)
+        else:
+            await waiter
+        return self.peek(league)
+
+    def add_listener(self, listener):
+        self._listeners.append(listener)
+
+    def peek(self, league: str):
+        """Return whatever is cached for a league without triggering a load."""
+        entry = self._entries.get(league)
+        return entry[0] if entry else None
+
+    def invalidate(self, league: str = None):
+        with self._lock:
+            if league is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(league, None)
+
+    def stats(self) -> dict:
+        now = time.time()
+        with self._lock:
+            return {
+                **self._counters,
+                "inflight": sorted(self._inflight),
+                "leagues": {
+                    league: {"age_seconds": round(now - loaded_at, 1)}
+                    for league, (_, loaded_at) in self._entries.items()
+                },
+            }
+
+    def _lookup(self, league: str):
+        """Serve from memory (caller holds the lock); None on a cold miss."""
+        entry = self._entries.get(league)
+        if entry is None:
+            return None
+        data, loaded_at = entry
+        if self.passive:
+            self._counters["hits"] += 1
+            if self._source_changed(league):
+                self._revalidate(league, cache_only=True)
+            return data
+        if time.time() - loaded_at < self._ttl:
+            self._counters["hits"] += 1
+            return data
+        self._counters["stale_hits"] += 1
+        self._revalidate(league, cache_only=False)
+        return data
+
+    def _source_changed(self, league: str) -> bool:
+        if self._source_stamp is None:
+            return False
+        now = time.time()
+        stamp, checked_at = self._stamps.get(league, (None, 0))
+        if now - checked_at < self._source_check:
+            return False
+        current = self._source_stamp(league)
+        self._stamps[league] = (stamp, now)
+        return current is not None and current != stamp
+
+    def _revalidate(self, league: str, cache_only: bool):
+        """Reload in a background thread unless a load is already running (caller holds the lock)."""
+        if league not in self._inflight:
+            self._inflight[league] = _Flight()
+            threading.Thread(
+                target=self._run_refresh, args=(league, False, cache_only),
+                name=f"fixture-refresh-{league}", daemon=True,
+            ).start()
+
+    def _join_flight(self, league: str):
+        """Return (flight, owner); the owner must run the loader (caller holds the lock)."""
+        flight = self._inflight.get(league)
+        if flight is not None:
+            return flight, False
+        flight = self._inflight[league] = _Flight()
+        return flight, True
+
+    def _run_refresh(self, league: str, force_refresh: bool, cache_only: bool = False):
+        data = None
+        try:
+            if cache_only and self._cache_only_loader is not None:
+                loaded = self._cache_only_loader(league)
+            else:
+                loaded = self._loader(league, force_refresh)
+            if loaded and self._build is not None:
+                loaded = self._build(league, loaded)
+            data = loaded
+        except Exception as e:
+            print(f"Fixture refresh failed for {league}: {e}")
+        finally:
+            self._finish_refresh(league, data)
+
+    async def _arun_refresh(self, league: str, force_refresh: bool, cache_only: bool = False):
+        data = None
+        try:
+            if cache_only and self._cache_only_loader is not None:
+                loaded = await asyncio.to_thread(self._cache_only_loader, league)
+            elif self._async_loader is not None:
+                loaded = await self._async_loader(league, force_refresh)
+            else:
+                loaded = await asyncio.to_thread(self._loader, league, force_refresh)
+            if loaded and self._build is not None:
+                loaded = await asyncio.to_thread(self._build, league, loaded)
+            data = loaded
+        except Exception as e:
+            print(f"Fixture refresh failed for {league}: {e}")
+        finally:
+            self._finish_refresh(league, data)
+
+    def _finish_refresh(self, league: str, data):
+        stamp = self._source_stamp(league) if data and self._source_stamp is not None else None
+        with self._lock:
+            previous = self._entries.get(league)
+            if data:
+                self._entries[league] = (data, time.time())
+                self._stamps[league] = (stamp, time.time())
+                self._counters["refreshes"] += 1
+            else:
+                self._counters["refresh_errors"] += 1
+            self._inflight.pop(league).finish()
+        if data:
+            for listener in self._listeners:
+                try:
+                    listener(league, previous[0] if previous else None, data)
+                except Exception as e:
+                    print(f"Fixture cache listener failed for {league}: {e}")
@@ -0,0 +1,39 @@
+import hashlib
+import json
+from fastapi.responses import Response
+
+# Revalidate on every use: the browser keeps the body and sends If-None-Match,
+# so an unchanged payload costs a header compare and an empty 304.
+CACHE_CONTROL = "no-cache"
+
+
+def json_bytes(payload) -> bytes:
+    """Serialize exactly like JSONResponse does."""
+    return json.dumps(
+        payload, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def etag_for(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match, etag: str) -> bool:
+    """RFC 9110 weak comparison of an If-None-Match header against `etag`."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque
+        for candidate in if_none_match.split(",")
+    )
+
+
+def conditional_json(request, body: bytes, etag: str) -> Response:
+    """200 with the pre-serialized body, or 304 if the client already has it."""
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
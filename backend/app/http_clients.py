@@ -0,0 +1,57 @@
+import asyncio
+import threading
+import weakref
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+POOL_CONNECTIONS = 10
+POOL_MAXSIZE = 20
+
+_session = None
+_session_lock = threading.Lock()
+
+# One AsyncClient per running event loop; pooled connections can't cross loops.
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_session() -> requests.Session:
+    """Process-wide requests.Session with a keep-alive connection pool."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Shared httpx.AsyncClient for the running event loop."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=POOL_MAXSIZE),
+            timeout=httpx.Timeout(20.0, connect=10.0),
+            follow_redirects=True,
+        )
+        _async_clients[loop] = client
+    return client
+
+
+async def close_clients():
+    """Close pooled clients (called from the app lifespan on shutdown)."""
+    global _session
+    loop = asyncio.get_running_loop()
+    client = _async_clients.pop(loop, None)
+    if client is not None:
+        await client.aclose()
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
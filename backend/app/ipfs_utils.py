@@ -1,50 +1,29 @@
-import requests
+import hashlib
+import httpx
 import json
-import os
+import requests
 from datetime import datetime
+from .cid_cache import cid_cache
+from .cid_index import cid_index
+from .metrics import span, inc
+from .storage_backends import storage_backend
 
-PINATA_API_KEY = os.getenv("PINATA_API_KEY")
-PINATA_SECRET_API_KEY = os.getenv("PINATA_SECRET_API_KEY")
-PINATA_PIN_URL = "https://api.pinata.cloud/pinning/pinJSONToIPFS"
-PINATA_GATEWAY = "https://gateway.pinata.cloud/ipfs/"
-
-# Store CIDs in a local file to track latest data
-cache_dir = os.getenv("CACHE_DIR", "cache")
-CID_STORE_PATH = os.path.join(cache_dir, "cids.json")
-
-def load_cid_store():
-    """Load the CID mapping from local storage"""
-    if os.path.exists(CID_STORE_PATH):
-        try:
-            with open(CID_STORE_PATH, "r") as f:
-                return json.load(f)
-        except json.JSONDecodeError:
-            print(f"Warning: Could not parse {CID_STORE_PATH}, starting fresh")
-            return {}
-    return {}
-
-def save_cid_store(cid_store):
-    """Save the CID mapping to local storage"""
-    os.makedirs(os.path.dirname(CID_STORE_PATH), exist_ok=True)
-    with open(CID_STORE_PATH, "w") as f:
-        json.dump(cid_store, f, indent=2)
+# Top-level keys that change on every save without changing the content
+VOLATILE_KEYS = ("_metadata", "timestamp")
 
-def save_to_ipfs(data: dict, name: str = "matches_data") -> str:
-    """
-    Saves dict JSON to Pinata IPFS and returns CID
-    """
-    if not PINATA_API_KEY or not PINATA_SECRET_API_KEY:
-        print("Pinata API keys not set, skipping IPFS upload")
-        return None
+def ipfs_configured() -> bool:
+    return storage_backend.configured
 
-    headers = {
-        "pinata_api_key": PINATA_API_KEY,
-        "pinata_secret_api_key": PINATA_SECRET_API_KEY,
-        "Content-Type": "application/json"
-    }
+def content_hash(data: dict) -> str:
+    """sha256 of the canonical JSON of `data`, ignoring upload metadata and timestamps."""
+    canonical = {k: v for k, v in data.items() if k not in VOLATILE_KEYS}
+    return hashlib.sha256(
+        json.dumps(canonical, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    ).hexdigest()
 
+def _with_metadata(data: dict, name: str) -> dict:
     # Add timestamp to data
-    data_with_meta = {
+    return {
         **data,
         "_metadata": {
             "uploaded_at": datetime.utcnow().isoformat(),
@@ -52,91 +31,162 @@ def save_to_ipfs(data: dict, name: str = "matches_data") -> str:
         }
     }
 
-    payload = {
-        "pinataContent": data_with_meta,
-        "pinataMetadata": {
-            "name": name,
-            "keyvalues": {
-                "uploaded_at": datetime.utcnow().isoformat()
-            }
-        }
-    }
+def _record_cid(name: str, cid: str, digest: str = None):
+    """Store the CID for this data"""
+    cid_index.record(name, cid, datetime.utcnow().isoformat(), digest)
 
-    try:
-        response = requests.post(PINATA_PIN_URL, json=payload, headers=headers, timeout=30)
-        response.raise_for_status()
-        result = response.json()
-        cid = result["IpfsHash"]
-        print(f"Data uploaded to Pinata: {cid} (name: {name})")
-        
-        # Store the CID for this data
-        cid_store = load_cid_store()
-        cid_store[name] = {
-            "cid": cid,
-            "timestamp": datetime.utcnow().isoformat()
-        }
-        save_cid_store(cid_store)
-        
+def pinned_cid(data: dict, name: str, digest: str = None):
+    """
+    CID already pinned for `name` with the same content, or None.
+    If it is an older CID, `name` is pointed back at it.
+    """
+    digest = digest or content_hash(data)
+    latest_cid, latest_hash = cid_index.latest_with_hash(name)
+    if latest_hash == digest:
+        cid = latest_cid
+    elif cid := cid_index.find(name, digest):
+        _record_cid(name, cid, digest)
+    else:
+        return None
+    inc("ipfs_uploads_total", outcome="deduplicated")
+    print(f"Content unchanged, reusing {cid} (name: {name})")
+    return cid
+
+def _resolve_cid(cid: str = None, name: str = None):
+    if not cid and name:
+        # Look up CID by name
+        cid = cid_index.latest(name)
+    return cid
+
+def _strip_metadata(data: dict) -> dict:
+    # Remove metadata before returning
+    if "_metadata" in data:
+        del data["_metadata"]
+    return data
+
+def save_to_ipfs(data: dict, name: str = "matches_data") -> str:
+    """
+    Saves dict JSON to IPFS (via the configured storage backend) and returns CID
+    """
+    if not ipfs_configured():
+        print(f"{storage_backend.name} storage not configured, skipping IPFS upload")
+        return None
+
+    digest = content_hash(data)
+    if cid := pinned_cid(data, name, digest):
         return cid
-    except requests.exceptions.Timeout:
-        print(f"Timeout uploading to Pinata: {name}")
+
+    try:
+        with span("pinata_upload"):
+            cid = storage_backend.pin(_with_metadata(data, name), name)
+    except Exception as e:
+        _upload_failed(name, e)
         return None
-    except requests.exceptions.RequestException as e:
-        print(f"Failed to upload to Pinata: {e}")
+    return _uploaded(data, name, cid, digest)
+
+async def save_to_ipfs_async(data: dict, name: str = "matches_data") -> str:
+    """Async twin of save_to_ipfs."""
+    if not ipfs_configured():
+        print(f"{storage_backend.name} storage not configured, skipping IPFS upload")
         return None
+
+    digest = content_hash(data)
+    if cid := pinned_cid(data, name, digest):
+        return cid
+
+    try:
+        with span("pinata_upload"):
+            cid = await storage_backend.apin(_with_metadata(data, name), name)
     except Exception as e:
-        print(f"Unexpected error uploading to Pinata: {e}")
+        _upload_failed(name, e)
+        return None
+    return _uploaded(data, name, cid, digest)
+
+def _uploaded(data: dict, name: str, cid: str, digest: str) -> str:
+    print(f"Data uploaded to {storage_backend.name}: {cid} (name: {name})")
+    _record_cid(name, cid, digest)
+    inc("ipfs_uploads_total", outcome="pinned")
+    cid_cache.put(cid, data)
+    return cid
+
+def _upload_failed(name: str, error: Exception):
+    inc("upstream_errors_total", upstream=storage_backend.name, kind="upload")
+    if isinstance(error, (requests.exceptions.Timeout, httpx.TimeoutException)):
+        print(f"Timeout uploading to {storage_backend.name}: {name}")
+    else:
+        print(f"Failed to upload to {storage_backend.name}: {error}")
+
+def _download_failed(cid: str, error: Exception):
+    inc("upstream_errors_total", upstream=storage_backend.name, kind="download")
+    if isinstance(error, (requests.exceptions.Timeout, httpx.TimeoutException)):
+        print(f"Timeout loading from {storage_backend.name}: {cid}")
+    else:
+        print(f"Failed to load from {storage_backend.name}: {error}")
+
+def _downloaded(cid: str, data):
+    if data is None:
+        print(f"CID not found in {storage_backend.name}: {cid}")
         return None
+    print(f"Data loaded from {storage_backend.name}: {cid}")
+    data = _strip_metadata(data)
+    cid_cache.put(cid, data)
+    return data
 
 def load_from_ipfs(cid: str = None, name: str = None) -> dict:
     """
-    Loads JSON dict from Pinata IPFS
+    Loads JSON dict from IPFS
     If cid is provided, uses that. Otherwise looks up by name.
     """
-    if not cid and name:
-        # Look up CID by name
-        cid_store = load_cid_store()
-        stored_data = cid_store.get(name)
-        if isinstance(stored_data, dict):
-            cid = stored_data.get("cid")
-        else:
-            cid = stored_data  # Backward compatibility
-        
+    cid = _resolve_cid(cid, name)
     if not cid:
         print(f"No CID found for {name}")
         return None
 
+    # CIDs are immutable, so a cached copy never needs revalidating
+    cached = cid_cache.get(cid)
+    if cached is not None:
+        return cached
+
     try:
-        url = f"{PINATA_GATEWAY}{cid}"
-        response = requests.get(url, timeout=15)
-        response.raise_for_status()
-        data = response.json()
-        print(f"Data loaded from Pinata: {cid}")
-        
-        # Remove metadata before returning
-        if "_metadata" in data:
-            del data["_metadata"]
-        
-        return data
-    except requests.exceptions.Timeout:
-        print(f"Timeout loading from Pinata: {cid}")
+        with span("pinata_download"):
+            data = storage_backend.fetch(cid)
+    except Exception as e:
+        _download_failed(cid, e)
         return None
-    except requests.exceptions.RequestException as e:
-        print(f"Failed to load from Pinata: {e}")
+    return _downloaded(cid, data)
+
+async def load_from_ipfs_async(cid: str = None, name: str = None) -> dict:
+    """Async twin of load_from_ipfs."""
+    cid = _resolve_cid(cid, name)
+    if not cid:
+        print(f"No CID found for {name}")
         return None
+
+    # CIDs are immutable, so a cached copy never needs revalidating
+    cached = cid_cache.get(cid)
+    if cached is not None:
+        return cached
+
+    try:
+        with span("pinata_download"):
+            data = await storage_backend.afetch(cid)
     except Exception as e:
-        print(f"Unexpected error loading from Pinata: {e}")
+        _download_failed(cid, e)
         return None
+    return _downloaded(cid, data)
+
+def gateway_url(cid: str):
+    """Public URL for a CID, if the backend has one."""
+    return storage_backend.gateway_url(cid) if cid else None
 
 def get_latest_cid(name: str) -> str:
     """Get the latest CID for a given data name"""
-    cid_store = load_cid_store()
-    stored_data = cid_store.get(name)
-    
-    if isinstance(stored_data, dict):
-        return stored_data.get("cid")
-    return stored_data  # Backward compatibility
+    return cid_index.latest(name)
+
+def get_cid_history(name: str) -> list:
+    """All CIDs ever stored for a name, newest first"""
+    return cid_index.history(name)
 
 def list_all_cids() -> dict:
     """List all stored CIDs with their metadata"""
-    return load_cid_store()
\ No newline at end of file
+    return cid_index.all()
\ No newline at end of file
@@ -0,0 +1,324 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from .cid_index import cid_index
+from .ipfs_utils import load_from_ipfs
+from .metrics import span
+from .upload_queue import upload_queue
+
+# Points per fixture: an exact score beats the right goal difference, which
+# beats just the right outcome (home win / draw / away win).
+EXACT_SCORE_POINTS = 5
+GOAL_DIFFERENCE_POINTS = 3
+OUTCOME_POINTS = 2
+
+LEADERBOARD_SYNC_SECONDS = float(os.getenv("LEADERBOARD_SYNC_SECONDS", "15"))
+LEADERBOARD_FETCH_WORKERS = int(os.getenv("LEADERBOARD_FETCH_WORKERS", "16"))
+
+_NO_PREDICTION = -1
+
+
+def score_predictions(pred_home, pred_away, real_home, real_away, played):
+    """
+    Points for a (users, fixtures) block of predictions against the real
+    results of those fixtures. Returns (points, exact, outcome) arrays of the
+    same shape; unpredicted or unplayed fixtures score nothing.
+    """
+    predicted = (pred_home != _NO_PREDICTION) & played
+    pred_diff = pred_home.astype(np.int16) - pred_away
+    real_diff = real_home.astype(np.int16) - real_away
+    outcome = predicted & (np.sign(pred_diff) == np.sign(real_diff))
+    same_diff = outcome & (pred_diff == real_diff)
+    exact = same_diff & (pred_home == real_home)
+    points = np.where(exact, EXACT_SCORE_POINTS,
+                      np.where(same_diff, GOAL_DIFFERENCE_POINTS,
+                               np.where(outcome, OUTCOME_POINTS, 0))).astype(np.int16)
+    return points, exact, outcome
+
+
+def _parse_score(value):
+    """'2-1' or {"homeScore": 2, "awayScore": 1} -> (2, 1); None if unusable."""
+    try:
+        if isinstance(value, dict):
+            home, away = int(value["homeScore"]), int(value["awayScore"])
+        else:
+            home, away = map(int, value.split("-"))
+    except (AttributeError, KeyError, TypeError, ValueError):
+        return None
+    if not (0 <= home < 100 and 0 <= away < 100):
+        return None
+    return home, away
+
+
+class Leaderboard:
+    """
+    Pool leaderboard for one league.
+
+    Predictions live in (users, fixtures) int8 matrices aligned with the
+    LeagueSnapshot fixture arrays, with per-fixture points kept alongside.
+    A new or changed user blob rescores only that user's row; a new snapshot
+    rescores only the fixtures whose real result changed (whole columns at
+    once). Totals are kept per user, so ranking is a single lexsort.
+    """
+
+    def __init__(self, snapshot):
+        self._lock = threading.Lock()
+        self._users = []          # row -> username
+        self._rows = {}           # username -> row
+        self._snapshot = None
+        self._fixture_keys = {}   # (matchday, "Home_vs_Away") -> column
+        self._capacity = 0
+        self._pred_home = self._pred_away = None
+        self._points = self._exact = self._outcome = None
+        self._totals = np.zeros(0, dtype=np.int32)
+        self._order = None        # cached ranking (row indices)
+        self._allocate(0, 0)
+        self.update_results(snapshot)
+
+    # -- state -------------------------------------------------------------
+
+    def _allocate(self, capacity, n_fixtures):
+        self._capacity = capacity
+        self._pred_home = np.full((capacity, n_fixtures), _NO_PREDICTION, dtype=np.int8)
+        self._pred_away = np.full((capacity, n_fixtures), _NO_PREDICTION, dtype=np.int8)
+        self._points = np.zeros((capacity, n_fixtures), dtype=np.int16)
+        self._exact = np.zeros((capacity, n_fixtures), dtype=bool)
+        self._outcome = np.zeros((capacity, n_fixtures), dtype=bool)
+
+    def _grow(self, needed):
+        if needed <= self._capacity:
+            return
+        old = (self._pred_home, self._pred_away, self._points, self._exact, self._outcome)
+        n = len(self._users)
+        self._allocate(max(needed, 2 * self._capacity, 64), old[0].shape[1])
+        for new, previous in zip((self._pred_home, self._pred_away, self._points, self._exact, self._outcome), old):
+            new[:n] = previous[:n]
+
+    def _rescore(self, rows=slice(None), columns=slice(None)):
+        snapshot = self._snapshot
+        n = len(self._users)
+        block = (slice(0, n), columns) if isinstance(rows, slice) else (rows, columns)
+        points, exact, outcome = score_predictions(
+            self._pred_home[block], self._pred_away[block],
+            snapshot.home_score[columns], snapshot.away_score[columns], snapshot.played[columns],
+        )
+        self._points[block] = points
+        self._exact[block] = exact
+        self._outcome[block] = outcome
+        self._totals = self._points[:n].sum(axis=1, dtype=np.int32)
+        self._order = None
+
+    # -- updates -----------------------------------------------------------
+
+    def update_results(self, snapshot):
+        """Adopt a new snapshot, rescoring only fixtures whose result changed."""
+        with self._lock:
+            previous = self._snapshot
+            if snapshot is previous:
+                return 0
+            keys = {
+                (day, f"{h}_vs_{a}"): snapshot.day_slices[day].start + i
+                for day in snapshot.matchdays
+                for i, (h, a) in enumerate(snapshot.fixtures_by_day[day])
+            }
+            old_keys = self._fixture_keys
+            same_fixtures = previous is not None and keys == old_keys
+            self._snapshot = snapshot
+            self._fixture_keys = keys
+
+            if same_fixtures:
+                changed = np.flatnonzero(
+                    (previous.played != snapshot.played)
+                    | (previous.home_score != snapshot.home_score)
+                    | (previous.away_score != snapshot.away_score)
+                )
+                if len(changed):
+                    with span("leaderboard_score"):
+                        self._rescore(columns=changed)
+                return len(changed)
+
+            # Fixture list changed (first load or a new season): re-map columns
+            old = (self._pred_home, self._pred_away)
+            self._allocate(self._capacity, len(snapshot))
+            n = len(self._users)
+            for key, old_column in old_keys.items():
+                new_column = keys.get(key)
+                if new_column is not None:
+                    self._pred_home[:n, new_column] = old[0][:n, old_column]
+                    self._pred_away[:n, new_column] = old[1][:n, old_column]
+            with span("leaderboard_score"):
+                self._rescore()
+            return len(snapshot)
+
+    def set_user(self, username: str, predictions_by_matchday: dict):
+        """Replace one user's predictions ({matchday: {"Home_vs_Away": "2-1"}})."""
+        with self._lock:
+            home = np.full(len(self._snapshot), _NO_PREDICTION, dtype=np.int8)
+            away = home.copy()
+            for day, predictions in (predictions_by_matchday or {}).items():
+                if not isinstance(predictions, dict):
+                    continue
+                for key, value in predictions.items():
+                    column = self._fixture_keys.get((str(day), key))
+                    score = _parse_score(value) if column is not None else None
+                    if score is not None:
+                        home[column], away[column] = score
+
+            row = self._rows.get(username)
+            if row is None:
+                row = len(self._users)
+                self._grow(row + 1)
+                self._users.append(username)
+                self._rows[username] = row
+            self._pred_home[row] = home
+            self._pred_away[row] = away
+            self._rescore(rows=[row])
+
+    def remove_user(self, username: str):
+        with self._lock:
+            row = self._rows.pop(username, None)
+            if row is None:
+                return
+            last = len(self._users) - 1
+            if row != last:
+                moved = self._users[last]
+                for matrix in (self._pred_home, self._pred_away, self._points, self._exact, self._outcome):
+                    matrix[row] = matrix[last]
+                self._users[row] = moved
+                self._rows[moved] = row
+            self._users.pop()
+            self._totals = self._points[:len(self._users)].sum(axis=1, dtype=np.int32)
+            self._order = None
+
+    # -- queries -----------------------------------------------------------
+
+    def _ranking(self):
+        if self._order is None:
+            n = len(self._users)
+            names = np.array(self._users, dtype=object)
+            exact = self._exact[:n].sum(axis=1)
+            outcome = self._outcome[:n].sum(axis=1)
+            # points, then exact scores, then correct outcomes; username breaks ties
+            self._order = np.lexsort((names, -outcome, -exact, -self._totals)) if n else np.zeros(0, dtype=np.int64)
+        return self._order
+
+    def _entry(self, row, sorted_totals):
+        n_fixtures = len(self._snapshot)
+        total = int(self._totals[row])
+        return {
+            # Equal points share a rank (1, 2, 2, 4, ...)
+            "rank": int(np.searchsorted(-sorted_totals, -total, side="left")) + 1,
+            "username": self._users[row],
+            "points": total,
+            "exact": int(self._exact[row, :n_fixtures].sum()),
+            "outcome": int(self._outcome[row, :n_fixtures].sum()),
+            "predicted": int((self._pred_home[row, :n_fixtures] != _NO_PREDICTION).sum()),
+        }
+
+    def page(self, offset=0, limit=50, username=None) -> dict:
+        with self._lock:
+            order = self._ranking()
+            sorted_totals = self._totals[order]
+            entries = [self._entry(row, sorted_totals) for row in order[offset:offset + limit]]
+            row = self._rows.get(username) if username else None
+            return {
+                "total_users": len(self._users),
+                "scored_fixtures": int(self._snapshot.played.sum()),
+                "offset": offset,
+                "limit": limit,
+                "entries": entries,
+                "user": self._entry(row, sorted_totals) if row is not None else None,
+            }
+
+
+class LeaderboardService:
+    """
+    Keeps one Leaderboard per league in sync with the fixture snapshots and
+    the users' pinned prediction blobs. Users are discovered through the CID
+    index; only users whose latest CID changed are re-fetched and rescored,
+    and the index is polled at most every LEADERBOARD_SYNC_SECONDS.
+
+    Syncs run outside the service lock, at most one per league at a time.
+    A league's first sync is awaited, since until then there is nothing to
+    rank. Later ones run in a background thread while requests are served
+    the current board.
+    """
+
+    def __init__(self, sync_seconds=LEADERBOARD_SYNC_SECONDS, fetch_workers=LEADERBOARD_FETCH_WORKERS):
+        self._sync_seconds = sync_seconds
+        self._fetch_workers = fetch_workers
+        self._lock = threading.Lock()
+        self._boards = {}    # league -> Leaderboard
+        self._cids = {}      # league -> {username: cid}
+        self._synced_at = {}
+        self._syncing = {}   # league -> Event set when its running sync finishes
+
+    def get(self, snapshot) -> Leaderboard:
+        league = snapshot.league
+        with self._lock:
+            board = self._boards.get(league)
+            if board is None:
+                board = self._boards[league] = Leaderboard(snapshot)
+                self._cids[league] = {}
+            else:
+                board.update_results(snapshot)
+
+            first_sync = league not in self._synced_at
+            flight = self._syncing.get(league)
+            start = flight is None and time.time() - self._synced_at.get(league, 0) >= self._sync_seconds
+            if start:
+                flight = self._syncing[league] = threading.Event()
+
+        if start and first_sync:
+            self._run_sync(league, board, flight)
+        elif start:
+            threading.Thread(target=self._run_sync, args=(league, board, flight),
+                             name=f"leaderboard-sync-{league}", daemon=True).start()
+        elif first_sync and flight is not None:
+            flight.wait()
+        return board
+
+    def _run_sync(self, league: str, board: Leaderboard, flight: threading.Event):
+        try:
+            self._sync_users(league, board)
+        except Exception as e:
+            print(f"Leaderboard sync failed for {league}: {e}")
+        finally:
+            with self._lock:
+                self._synced_at[league] = time.time()
+                del self._syncing[league]
+            flight.set()
+
+    def _sync_users(self, league: str, board: Leaderboard):
+        suffix = f"_{league}_all_predictions"
+        latest = {name[:-len(suffix)]: cid for name, cid in cid_index.latest_matching(suffix).items()}
+        # Saves still queued for upload (on any worker) are scored from their data directly
+        pending = {}
+        for name, (version, data) in upload_queue.pending_matching(suffix).items():
+            user = name[:-len(suffix)]
+            latest[user] = f"pending:{version}"
+            pending[user] = data
+        known = self._cids[league]
+        changed = {user: cid for user, cid in latest.items() if known.get(user) != cid}
+
+        for user in set(known) - set(latest):
+            board.remove_user(user)
+            del known[user]
+        if not changed:
+            return
+
+        with span("leaderboard_fetch"), ThreadPoolExecutor(self._fetch_workers) as pool:
+            fetch = [user for user in changed if user not in pending]
+            blobs = dict(zip(fetch, pool.map(load_from_ipfs, (changed[user] for user in fetch))))
+        blobs.update((user, pending[user]) for user in changed if user in pending)
+        with span("leaderboard_score"):
+            for user, blob in blobs.items():
+                if blob is None:
+                    continue  # try again on the next sync
+                board.set_user(user, blob.get("predictions"))
+                known[user] = changed[user]
+
+
+leaderboards = LeaderboardService()
@@ -1,3 +1,10 @@
+from bisect import bisect_left, insort
+import numpy as np
+
+# Column order of LeagueTable.to_arrays()
+STAT_KEYS = ("points", "goal_difference", "played", "won", "draw", "lost")
+
+
 def calculate_league_table(matches, predictions):
     teams = {}
     for (home, away), (home_score, away_score) in predictions.items():
@@ -50,4 +57,119 @@ def format_table_for_frontend(teams_dict):
     # Sort by points (desc), then by goal difference (desc)
     table.sort(key=lambda x: (x["points"], x["gd"]), reverse=True)
     
-    return table
\ No newline at end of file
+    return table
+
+class LeagueTable:
+    """
+    Incrementally maintained league table.
+
+    Results are applied and reverted as deltas, and the ranking is kept as a
+    sorted list of (-points, -gd, seq, team) keys so that a changed team is
+    repositioned with two bisections instead of re-sorting the whole table.
+    `seq` is the order in which a team was first seen, which reproduces the
+    stable tie-breaking of `format_table_for_frontend`.
+    """
+
+    def __init__(self, results=None):
+        self._stats = {}    # team -> stats dict, same shape as calculate_league_table
+        self._seq = {}      # team -> first-seen index
+        self._ranking = []  # sorted rank keys
+        self._rows = {}     # team -> cached frontend row
+        if results:
+            for (home, away), score in results.items():
+                self.apply(home, away, score)
+
+    def apply(self, home, away, score):
+        self._update(home, away, score, 1)
+
+    def revert(self, home, away, score):
+        self._update(home, away, score, -1)
+
+    def replace(self, home, away, old_score, new_score):
+        """Retract `old_score` (if any) and apply `new_score` for one fixture."""
+        if old_score == new_score:
+            return
+        if old_score is not None:
+            self.revert(home, away, old_score)
+        self.apply(home, away, new_score)
+
+    def stats(self):
+        return self._stats
+
+    def copy(self):
+        """Independent table with the same results applied (O(teams))."""
+        other = LeagueTable()
+        other._stats = {team: dict(stats) for team, stats in self._stats.items()}
+        other._seq = dict(self._seq)
+        other._ranking = list(self._ranking)
+        other._rows = dict(self._rows)  # rows are replaced, never mutated
+        return other
+
+    def to_frontend(self):
+        """Sorted table in the `format_table_for_frontend` row format."""
+        return [self._rows[key[3]] for key in self._ranking]
+
+    def to_arrays(self):
+        """(teams in first-seen order, int32 array of STAT_KEYS per team) for vectorized use."""
+        teams = tuple(sorted(self._seq, key=self._seq.get))
+        stats = np.array([[self._stats[team][key] for key in STAT_KEYS] for team in teams], dtype=np.int32)
+        return teams, stats.reshape(len(teams), len(STAT_KEYS))
+
+    def _update(self, home, away, score, sign):
+        home_score, away_score = score
+        for team in (home, away):
+            if team not in self._stats:
+                self._stats[team] = {
+                    "played": 0, "won": 0, "draw": 0, "lost": 0,
+                    "points": 0, "goal_difference": 0
+                }
+                self._seq[team] = len(self._seq)
+            else:
+                self._unrank(team)
+
+        home_stats, away_stats = self._stats[home], self._stats[away]
+        home_stats["played"] += sign
+        away_stats["played"] += sign
+
+        if home_score > away_score:
+            home_stats["won"] += sign
+            away_stats["lost"] += sign
+            home_stats["points"] += 3 * sign
+        elif home_score < away_score:
+            away_stats["won"] += sign
+            home_stats["lost"] += sign
+            away_stats["points"] += 3 * sign
+        else:
+            home_stats["draw"] += sign
+            away_stats["draw"] += sign
+            home_stats["points"] += sign
+            away_stats["points"] += sign
+
+        home_stats["goal_difference"] += (home_score - away_score) * sign
+        away_stats["goal_difference"] += (away_score - home_score) * sign
+
+        for team in (home, away):
+            self._rank(team)
+
+    def _rank_key(self, team):
+        stats = self._stats[team]
+        return (-stats["points"], -stats["goal_difference"], self._seq[team], team)
+
+    def _unrank(self, team):
+        key = self._rank_key(team)
+        index = bisect_left(self._ranking, key)
+        if index < len(self._ranking) and self._ranking[index] == key:
+            del self._ranking[index]
+
+    def _rank(self, team):
+        insort(self._ranking, self._rank_key(team))
+        stats = self._stats[team]
+        self._rows[team] = {
+            "team": team,
+            "points": stats["points"],
+            "gd": stats["goal_difference"],
+            "played": stats["played"],
+            "won": stats["won"],
+            "draw": stats["draw"],
+            "lost": stats["lost"]
+        }
@@ -0,0 +1,203 @@
+import asyncio
+import os
+import time
+import numpy as np
+from .http_cache import json_bytes
+from .metrics import register_collector
+
+# Comment frame sent to every subscriber to keep proxies from closing idle streams
+STREAM_HEARTBEAT_SECONDS = float(os.getenv("STREAM_HEARTBEAT_SECONDS", "20"))
+# How often leagues with subscribers are checked for new data
+STREAM_POLL_SECONDS = float(os.getenv("STREAM_POLL_SECONDS", "5"))
+# Frames a subscriber may fall behind before it is told to resync instead
+STREAM_QUEUE_SIZE = int(os.getenv("STREAM_QUEUE_SIZE", "8"))
+# Reconnect delay suggested to EventSource clients
+STREAM_RETRY_MS = 5000
+
+_HEARTBEAT = b": ping\n\n"
+
+
+def sse_frame(event: str, payload: dict, event_id: str = None) -> bytes:
+    head = f"id: {event_id}\n" if event_id else ""
+    return f"{head}event: {event}\n".encode("utf-8") + b"data: " + json_bytes(payload) + b"\n\n"
+
+
+def snapshot_diff(old, new):
+    """
+    Compact diff between two LeagueSnapshots: the fixtures whose result
+    changed and the table rows whose contents or position changed.
+    None if the fixture list itself changed (clients should refetch).
+    """
+    if old is None or len(old) != len(new) or old.fixtures_by_day != new.fixtures_by_day:
+        return None
+
+    changed = np.flatnonzero(
+        (old.played != new.played) | (old.home_score != new.home_score) | (old.away_score != new.away_score)
+    )
+    fixtures = []
+    for i in changed.tolist():
+        played = bool(new.played[i])
+        fixtures.append({
+            "matchday": new.matchdays[new.matchday[i]],
+            "home": new.teams[new.home[i]],
+            "away": new.teams[new.away[i]],
+            "home_score": int(new.home_score[i]) if played else None,
+            "away_score": int(new.away_score[i]) if played else None,
+            "played": played,
+        })
+
+    old_rows = {row["team"]: (position, row) for position, row in enumerate(old.baseline_rows, 1)}
+    table = [
+        {"position": position, **row}
+        for position, row in enumerate(new.baseline_rows, 1)
+        if old_rows.get(row["team"]) != (position, row)
+    ]
+    new_teams = {row["team"] for row in new.baseline_rows}
+    return {
+        "fixtures": fixtures,
+        "table": table,
+        "removed_teams": [team for team in old_rows if team not in new_teams],
+        "first_unplayed_matchday": new.first_unplayed_matchday,
+        "played_matchdays": new.played_matchdays,
+        "played_matches": len(new.real_results),
+    }
+
+
+class _Subscriber:
+    __slots__ = ("queue",)
+
+    def __init__(self):
+        self.queue = asyncio.Queue(STREAM_QUEUE_SIZE)
+
+
+class LiveUpdates:
+    """
+    Per-league Server-Sent Events fan-out.
+
+    Registered as a FixtureCache listener: when a league's snapshot changes,
+    the diff is computed and serialized into one SSE frame, and that same
+    bytes object is queued for every subscriber. An idle subscriber is just
+    a small queue and a suspended generator; one shared task sends the
+    heartbeats and, for leagues that have subscribers, touches the fixture
+    cache so new data (e.g. written by another worker's scheduler) is picked
+    up even when nobody is polling. A subscriber that falls STREAM_QUEUE_SIZE
+    frames behind gets a single `resync` frame instead of the backlog.
+    """
+
+    def __init__(self, fixture_cache, heartbeat=STREAM_HEARTBEAT_SECONDS, poll=STREAM_POLL_SECONDS):
+        self._cache = fixture_cache
+        self._heartbeat = heartbeat
+        self._poll = poll
+        self._subscribers = {}  # league -> set of _Subscriber
+        self._loop = None
+        self._pump_task = None
+        self._closing = False
+        self._counters = {"broadcasts": 0, "frames": 0, "resyncs": 0}
+        fixture_cache.add_listener(self._on_update)
+
+    def stats(self) -> dict:
+        return {**self._counters, "subscribers": {league: len(subs) for league, subs in self._subscribers.items()}}
+
+    async def stream(self, league: str, snapshot, last_event_id: str = None):
+        """Async iterator of SSE frames for one client, starting with a `hello` (or `resync`)."""
+        if self._closing:
+            return
+        subscriber = _Subscriber()
+        self._loop = asyncio.get_running_loop()
+        self._subscribers.setdefault(league, set()).add(subscriber)
+        if self._pump_task is None or self._pump_task.done():
+            self._pump_task = asyncio.create_task(self._pump(), name="live-updates-pump")
+        try:
+            yield f"retry: {STREAM_RETRY_MS}\n".encode("ascii")
+            event = "resync" if last_event_id and last_event_id != snapshot.version else "hello"
+            yield sse_frame(event, {"league": snapshot.league, "version": snapshot.version}, snapshot.version)
+            while True:
+                frame = await subscriber.queue.get()
+                if frame is None:
+                    return
+                yield frame
+        finally:
+            subscribers = self._subscribers.get(league)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[league]
+
+    def close(self):
+        """End every open stream (servers wait for streaming responses before shutting down)."""
+        self._closing = True
+        if self._loop is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._close_all)
+            except RuntimeError:
+                pass
+
+    def _close_all(self):
+        for subscribers in self._subscribers.values():
+            for subscriber in subscribers:
+                while not subscriber.queue.empty():
+                    subscriber.queue.get_nowait()
+                subscriber.queue.put_nowait(None)
+
+    def _on_update(self, league: str, old, new):
+        # Runs on whichever thread finished the load
+        loop = self._loop
+        if loop is None or not self._subscribers.get(league) or (old is not None and old.version == new.version):
+            return
+        diff = snapshot_diff(old, new)
+        payload = {"league": new.league, "version": new.version,
+                   "previous_version": old.version if old is not None else None}
+        if diff is None:
+            frame = sse_frame("resync", payload, new.version)
+        else:
+            frame = sse_frame("update", {**payload, **diff}, new.version)
+        try:
+            loop.call_soon_threadsafe(self._broadcast, league, frame)
+        except RuntimeError:
+            pass  # loop closed during shutdown
+
+    def _broadcast(self, league: str, frame: bytes):
+        subscribers = self._subscribers.get(league, ())
+        if frame is not _HEARTBEAT:
+            self._counters["broadcasts"] += 1
+        for subscriber in subscribers:
+            self._offer(subscriber, league, frame)
+
+    def _offer(self, subscriber: _Subscriber, league: str, frame: bytes):
+        try:
+            subscriber.queue.put_nowait(frame)
+            self._counters["frames"] += 1
+        except asyncio.QueueFull:
+            if frame is _HEARTBEAT:
+                return
+            # Too far behind: drop the backlog, the client refetches instead
+            while not subscriber.queue.empty():
+                subscriber.queue.get_nowait()
+            self._counters["resyncs"] += 1
+            subscriber.queue.put_nowait(sse_frame("resync", {"league": league.upper()}))
+
+    async def _pump(self):
+        next_heartbeat = time.monotonic() + self._heartbeat
+        while self._subscribers:
+            await asyncio.sleep(min(self._poll, self._heartbeat))
+            for league in list(self._subscribers):
+                try:
+                    await self._cache.aget(league)  # revalidates / follows the on-disk cache
+                except Exception as e:
+                    print(f"Live update poll failed for {league}: {e}")
+            if time.monotonic() >= next_heartbeat:
+                next_heartbeat = time.monotonic() + self._heartbeat
+                for league in list(self._subscribers):
+                    self._broadcast(league, _HEARTBEAT)
+
+
+def register_metrics(live_updates: LiveUpdates):
+    @register_collector
+    def _live_update_metrics():
+        stats = live_updates.stats()
+        for league, count in stats["subscribers"].items():
+            yield ("live_update_subscribers", "gauge", "Open /stream connections.", {"league": league}, count)
+        yield ("live_update_broadcasts_total", "counter", "Diff frames serialized for broadcast.", {},
+               stats["broadcasts"])
+        yield ("live_update_resyncs_total", "counter", "Subscribers told to resync after falling behind.", {},
+               stats["resyncs"])
@@ -0,0 +1,43 @@
+import datetime
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, Response
+from .storage_backends import LocalBackend, canonical_json
+
+# Drop-in local replacement for the Pinata pinning API and IPFS gateway,
+# backed by a LocalBackend directory (IPFS_LOCAL_DIR):
+#   uvicorn app.local_gateway:app --port 8081
+# then point PINATA_PIN_URL at http://localhost:8081/pinning/pinJSONToIPFS and
+# PINATA_GATEWAY at http://localhost:8081/ipfs/ (or use IPFS_BACKEND=local to
+# skip HTTP entirely).
+app = FastAPI(title="Local IPFS gateway")
+store = LocalBackend()
+
+
+@app.post("/pinning/pinJSONToIPFS")
+def pin_json(body: dict):
+    content = body.get("pinataContent")
+    if content is None:
+        return JSONResponse({"error": "Missing pinataContent"}, status_code=400)
+    blob = canonical_json(content)
+    cid = store.put_blob(blob)
+    return {
+        "IpfsHash": cid,
+        "PinSize": len(blob),
+        "Timestamp": datetime.datetime.utcnow().isoformat() + "Z",
+    }
+
+
+@app.get("/ipfs/{cid}")
+def get_content(cid: str):
+    blob = store.get_blob(cid)
+    if blob is None:
+        return JSONResponse({"error": "Not found"}, status_code=404)
+    # Content under a CID never changes
+    return Response(content=blob, media_type="application/json", headers={
+        "ETag": f'"{cid}"', "Cache-Control": "public, max-age=31536000, immutable",
+    })
+
+
+@app.get("/health")
+def health():
+    return {"status": "ok", "directory": store.directory}
@@ -1,9 +1,55 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from app.routes import router
+from fastapi.responses import PlainTextResponse
+from app.routes import router, refresh_scheduler, live_updates
+from app.http_clients import close_clients
+from app.upload_queue import upload_queue
+from app.bulk_export import bulk_exporter
+from app.metrics import observe, inc, render_prometheus
 import os
+import signal
+import time
 
-app = FastAPI(title="UEFA Predictor API")
+REFRESH_SCHEDULER = os.getenv("REFRESH_SCHEDULER", "1") == "1"
+
+def close_streams_on_exit():
+    """
+    Chain onto the server's SIGINT/SIGTERM handlers so open /stream
+    connections end as soon as shutdown starts; otherwise the server waits
+    on them before it gets to the lifespan shutdown below.
+    """
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        previous = signal.getsignal(sig)
+        if not callable(previous):
+            continue
+
+        def handler(signum, frame, previous=previous):
+            live_updates.close()
+            previous(signum, frame)
+
+        try:
+            signal.signal(sig, handler)
+        except ValueError:
+            return  # not the main thread (e.g. under TestClient)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if REFRESH_SCHEDULER:
+        refresh_scheduler.start()
+    close_streams_on_exit()
+    # Saves queued by a worker that died before uploading them
+    await asyncio.to_thread(upload_queue.recover)
+    yield
+    live_updates.close()
+    await refresh_scheduler.stop()
+    # Don't lose debounced saves on shutdown
+    await asyncio.to_thread(upload_queue.flush, 30)
+    bulk_exporter.shutdown()
+    await close_clients()
+
+app = FastAPI(title="UEFA Predictor API", lifespan=lifespan)
 
 # Get frontend URL from environment or use defaults
 frontend_url = os.getenv("FRONTEND_URL", "http://localhost:5173")
@@ -29,7 +75,41 @@ app.add_middleware(
 )
 
 # API routes under /api
-app.include_router(router, prefix="/api")
+API_PREFIX = "/api"
+app.include_router(router, prefix=API_PREFIX)
+# FastAPI >= 0.120 matches the router's own routes, whose paths lack the prefix
+_api_routes = {id(route) for route in router.routes}
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Label by route template, not raw path, to keep cardinality bounded
+        route = request.scope.get("route")
+        if route is None:
+            path = "unmatched"
+        elif id(route) in _api_routes:
+            path = API_PREFIX + route.path
+        else:
+            path = route.path
+        observe("http_request_duration_seconds", time.perf_counter() - start,
+                method=request.method, route=path)
+        inc("http_requests_total", method=request.method, route=path, status=str(status))
+
+@app.get("/metrics")
+def metrics():
+    """
+    Prometheus scrape endpoint.
+
+    Metrics live in process memory, so under `python -m app.serve` with
+    several workers each scrape reports only the worker that answered it.
+    """
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
 
 # Add a health check endpoint at root
 @app.get("/")
@@ -0,0 +1,110 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Latency buckets in seconds (Prometheus `le` boundaries)
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+_lock = threading.Lock()
+_histograms = {}   # (name, labels) -> [bucket counts..., sum, count]
+_counters = {}     # (name, labels) -> value
+_help = {
+    "stage_duration_seconds": ("histogram", "Time spent in each backend stage."),
+    "http_request_duration_seconds": ("histogram", "HTTP request latency by route."),
+    "http_requests_total": ("counter", "HTTP requests by route and status."),
+    "upstream_errors_total": ("counter", "Failed calls to fbref / Pinata."),
+    "ipfs_uploads_total": ("counter", "IPFS saves by outcome (pinned / deduplicated)."),
+    "pdf_export_render_seconds": ("histogram", "Render time of one PDF in a bulk export."),
+    "pdf_exports_total": ("counter", "Bulk PDF export jobs by outcome."),
+}
+_collectors = []
+
+
+def _key(labels: dict):
+    return tuple(sorted(labels.items()))
+
+
+def observe(name: str, seconds: float, **labels):
+    key = (name, _key(labels))
+    index = bisect_left(BUCKETS, seconds)
+    with _lock:
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = _histograms[key] = [0] * (len(BUCKETS) + 1) + [0.0, 0]
+        hist[index] += 1
+        hist[-2] += seconds
+        hist[-1] += 1
+
+
+def inc(name: str, amount=1, **labels):
+    key = (name, _key(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+@contextmanager
+def span(stage: str):
+    """Time a block into stage_duration_seconds{stage=...}."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe("stage_duration_seconds", time.perf_counter() - start, stage=stage)
+
+
+def register_collector(fn):
+    """
+    Register fn() -> iterable of (name, type, help, labels, value) samples,
+    read at scrape time (used for counters owned by other modules).
+    """
+    _collectors.append(fn)
+    return fn
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    parts = []
+    for k, v in labels:
+        v = str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{k}="{v}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def render_prometheus() -> str:
+    """Prometheus text exposition format (version 0.0.4)."""
+    with _lock:
+        histograms = {k: list(v) for k, v in _histograms.items()}
+        counters = dict(_counters)
+
+    lines = []
+    seen = set()
+
+    def header(name, kind, text):
+        if name not in seen:
+            seen.add(name)
+            lines.append(f"# HELP {name} {text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+    for (name, labels), hist in sorted(histograms.items()):
+        header(name, *_help.get(name, ("histogram", name)))
+        cumulative = 0
+        for bound, count in zip(BUCKETS, hist):
+            cumulative += count
+            lines.append(f"{name}_bucket{_format_labels(labels + (('le', bound),))} {cumulative}")
+        cumulative += hist[len(BUCKETS)]
+        lines.append(f"{name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {cumulative}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {hist[-2]:.6f}")
+        lines.append(f"{name}_count{_format_labels(labels)} {hist[-1]}")
+
+    for (name, labels), value in sorted(counters.items()):
+        header(name, *_help.get(name, ("counter", name)))
+        lines.append(f"{name}{_format_labels(labels)} {value}")
+
+    for collector in _collectors:
+        for name, kind, text, labels, value in collector():
+            header(name, kind, text)
+            lines.append(f"{name}{_format_labels(_key(labels))} {value}")
+
+    return "\n".join(lines) + "\n"
@@ -1,19 +1,25 @@
-from reportlab.lib.pagesizes import A4
-from reportlab.platypus import (
-    SimpleDocTemplate,
-    Paragraph,
-    Spacer,
-    PageBreak,
-    Table,
-    TableStyle,
-)
-from reportlab.lib.styles import getSampleStyleSheet
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+import zlib
+from array import array
+from itertools import islice
 from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import inch
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from .metrics import span
+
+PDF_CACHE_MAX_BYTES = int(os.getenv("PDF_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
 
-styles = getSampleStyleSheet()
-title_style = styles["Title"]
-subtitle_style = styles["Heading2"]
-normal_style = styles["BodyText"]
+# Rendered PDFs keyed by a hash of their inputs (LRU, bounded by total bytes)
+_pdf_cache = OrderedDict()
+_pdf_cache_size = 0
+_pdf_cache_lock = threading.Lock()
 
 # NORMALIZE MIXED-KEY ROWS
 def normalize_keys(row):
@@ -30,83 +36,308 @@ def normalize_keys(row):
     }
 
 
-def export_to_pdf(table_data, filename, predictions=None, username=None, league=None):
-    doc = SimpleDocTemplate(filename, pagesize=A4)
-    story = []
-
-    # HEADER
-    def add_header():
-        parts = []
-        if username:
-            parts.append(f"Predictions by: <b>{username}</b>")
-        if league:
-            parts.append(f"League: <b>{league}</b>")
-        if parts:
-            story.append(Paragraph(" | ".join(parts), normal_style))
-            story.append(Spacer(0, 6))
-
-    # MATCHDAY PREDICTION PAGES
-    if predictions:
-        for matchday in sorted(predictions.keys(), key=lambda x: int(x)):
-            add_header()
-            story.append(Paragraph(f"Matchday {matchday} Predictions", title_style))
-            story.append(Spacer(0, 12))
-
-            rows = [["Match", "Prediction"]]
-            day_preds = predictions[matchday]
-
-            for match, score in day_preds.items():
-                home, away = match.split("_vs_")
-                rows.append([f"{home} vs {away}", score])
-
-            t = Table(rows, colWidths=[250, 100])
-            t.setStyle(TableStyle([
-                ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
-                ("BOX", (0, 0), (-1, -1), 1, colors.black),
-                ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
-                ("FONTSIZE", (0, 0), (-1, -1), 10),
-            ]))
-
-            story.append(t)
-            story.append(PageBreak())
-
-    # FINAL TABLE PAGES
-    add_header()
-
-    story.append(Paragraph("Final League Table", title_style))
-    story.append(Spacer(0, 12))
-
-    headers = ["Pos", "Team", "P", "W", "D", "L", "GF", "GA", "GD", "Pts"]
-    rows = [headers]
-
-    for i, row in enumerate(table_data, start=1):
-        r = normalize_keys(row)
-        rows.append([
-            i,
-            r["team"],
-            r["played"],
-            r["wins"],
-            r["draws"],
-            r["loss"],
-            r["goals_for"],
-            r["goals_against"],
-            r["goal_diff"],
-            r["points"],
-        ])
-
-    chunk_size = 30
-    for start in range(0, len(rows), chunk_size):
-        chunk = rows[start:start + chunk_size]
-
-        t = Table(chunk, colWidths=[20, 130, 20, 20, 20, 20, 25, 25, 25, 25])
-        t.setStyle(TableStyle([
-            ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
-            ("BOX", (0, 0), (-1, -1), 1, colors.black),
-            ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
-            ("FONTSIZE", (0, 0), (-1, -1), 9),
-        ]))
-
-        story.append(t)
-        story.append(PageBreak())
-
-    doc.build(story)
+# PAGE TEMPLATES
+# Geometry of the original SimpleDocTemplate layout: 1in margins, 6pt frame padding
+PAGE_WIDTH, PAGE_HEIGHT = A4
+_LEFT = inch + 6
+_RIGHT = PAGE_WIDTH - inch - 6
+_TOP = PAGE_HEIGHT - inch - 6
+_BOTTOM = inch + 6
+_BANNER_BASELINE = _TOP - 10
+_TITLE_BASELINE = _TOP - 36  # below the banner line and its spacer
+_TABLE_TOP = _TOP - 58  # below the title and its spacer
+_ROW_HEIGHT = 18  # 12pt leading plus 3pt padding above and below
+_CELL_PADDING = 6
+_FONTS = {"Helvetica": b"/F1", "Helvetica-Bold": b"/F2"}
+
+
+def _num(value: float) -> bytes:
+    return f"{value:.2f}".rstrip("0").rstrip(".").encode("ascii")
+
+
+def _text(value) -> bytes:
+    """A PDF string literal; the standard fonts only cover WinAnsi, anything else prints as '?'."""
+    raw = str(value).encode("cp1252", "replace")
+    return b"(" + raw.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+
+def _rgb(color, operator: bytes) -> bytes:
+    return b" ".join(_num(channel) for channel in color.rgb()) + b" " + operator
+
+
+class PageTemplate:
+    """
+    One table page layout, compiled once at import: the text-positioning
+    operators for every cell a page can hold, and the static frame (heading
+    row, grid, box) for each row count, which a document writes once as a
+    form and stamps onto every page that uses it.
+    """
+
+    def __init__(self, name, headings, col_widths, font_size):
+        self.name = name
+        self.headings = headings
+        self.font_size = font_size
+        self.left = _LEFT + (_RIGHT - _LEFT - sum(col_widths)) / 2
+        self.edges = [self.left]
+        for width in col_widths:
+            self.edges.append(self.edges[-1] + width)
+        self.rows_per_page = int((_TABLE_TOP - _BOTTOM) // _ROW_HEIGHT) - 1  # minus the heading row
+        # Baseline above a row's bottom edge, where platypus puts a one-line cell
+        baseline = 3 + 12 - font_size
+        self._font = b"/F1 " + _num(font_size) + b" Tf "
+        self._cells = [
+            [b"1 0 0 1 " + _num(edge + _CELL_PADDING) + b" " + _num(_TABLE_TOP - (r + 1) * _ROW_HEIGHT + baseline) + b" Tm "
+             for edge in self.edges[:-1]]
+            for r in range(self.rows_per_page + 1)
+        ]
+        self._frames = {}
+
+    def frame(self, n_rows: int) -> bytes:
+        """Content of the static frame around a table of n_rows."""
+        frame = self._frames.get(n_rows)
+        if frame is None:
+            top, bottom = _TABLE_TOP, _TABLE_TOP - (n_rows + 1) * _ROW_HEIGHT
+            left, right = _num(self.edges[0]), _num(self.edges[-1])
+            width = _num(self.edges[-1] - self.edges[0])
+            ops = [
+                _rgb(colors.lightgrey, b"rg"),
+                left + b" " + _num(top - _ROW_HEIGHT) + b" " + width + b" " + _num(_ROW_HEIGHT) + b" re f",
+                b"0.5 w " + _rgb(colors.grey, b"RG"),
+            ]
+            ops += [_num(x) + b" " + _num(top) + b" m " + _num(x) + b" " + _num(bottom) + b" l"
+                    for x in self.edges]
+            ops += [left + b" " + _num(top - i * _ROW_HEIGHT) + b" m " + right + b" " + _num(top - i * _ROW_HEIGHT) + b" l"
+                    for i in range(n_rows + 2)]
+            ops += [b"S", b"1 w 0 0 0 RG",
+                    left + b" " + _num(bottom) + b" " + width + b" " + _num(top - bottom) + b" re S",
+                    b"0 0 0 rg", self.cells([self.headings], start=0)]
+            frame = self._frames[n_rows] = b"\n".join(ops)
+        return frame
+
+    def cells(self, rows, start=1) -> bytes:
+        """Text object drawing `rows` from table row `start` down (row 0 is the heading row)."""
+        parts = [b"BT ", self._font]
+        for origins, row in zip(self._cells[start:], rows):
+            for origin, value in zip(origins, row):
+                parts.append(origin)
+                parts.append(_text(value))
+                parts.append(b" Tj ")
+        parts.append(b"ET")
+        return b"".join(parts)
+
+
+MATCHDAY_PAGE = PageTemplate("matchday", ["Match", "Prediction"], [250, 100], 10)
+STANDINGS_PAGE = PageTemplate(
+    "standings",
+    ["Pos", "Team", "P", "W", "D", "L", "GF", "GA", "GD", "Pts"],
+    [20, 130, 20, 20, 20, 20, 25, 25, 25, 25],
+    9,
+)
+# Frames of full pages, the common case, are built up front
+for _template in (MATCHDAY_PAGE, STANDINGS_PAGE):
+    _template.frame(_template.rows_per_page)
+
+
+def _banner(username=None, league=None) -> bytes:
+    """Content of the "Predictions by: <b>user</b> | League: <b>UCL</b>" line, or b"" without either."""
+    runs = []
+    if username:
+        runs += [("Helvetica", "Predictions by: "), ("Helvetica-Bold", username)]
+    if league:
+        runs += [("Helvetica", " | League: " if runs else "League: "), ("Helvetica-Bold", league)]
+    if not runs:
+        return b""
+    parts = [b"BT 1 0 0 1 " + _num(_LEFT) + b" " + _num(_BANNER_BASELINE) + b" Tm "]
+    for font, run in runs:
+        parts.append(_FONTS[font] + b" 10 Tf " + _text(run) + b" Tj ")
+    parts.append(b"ET")
+    return b"".join(parts)
+
+
+def _title(title: str) -> bytes:
+    x = (PAGE_WIDTH - stringWidth(title, "Helvetica-Bold", 18)) / 2
+    return b"BT /F2 18 Tf 1 0 0 1 " + _num(x) + b" " + _num(_TITLE_BASELINE) + b" Tm " + _text(title) + b" Tj ET"
+
+
+def _template_pages(template, title, rows):
+    rows = iter(rows)
+    chunk = list(islice(rows, template.rows_per_page))
+    yield template, title, chunk  # a table with no rows still gets its page
+    while chunk := list(islice(rows, template.rows_per_page)):
+        yield template, title, chunk
+
+
+def _pages(table_data, predictions=None):
+    """(template, title, rows) for every page, one page of rows at a time."""
+    for matchday in sorted(predictions or {}, key=int):
+        rows = ((match.replace("_vs_", " vs "), score) for match, score in predictions[matchday].items())
+        yield from _template_pages(MATCHDAY_PAGE, f"Matchday {matchday} Predictions", rows)
+
+    rows = (
+        (i, r["team"], r["played"], r["wins"], r["draws"], r["loss"],
+         r["goals_for"], r["goals_against"], r["goal_diff"], r["points"])
+        for i, r in enumerate(map(normalize_keys, table_data), start=1)
+    )
+    yield from _template_pages(STANDINGS_PAGE, "Final League Table", rows)
+
+
+class PdfStreamWriter:
+    """
+    Minimal PDF writer that sends each page to `out` as soon as it is added.
+
+    Only the standard Helvetica fonts and form XObjects are supported, which
+    is all the templates need. Apart from the page being written, it keeps an
+    offset per object and an object number per page for the trailer, so a
+    document's memory doesn't grow with its length the way reportlab's
+    canvas (which holds every page until save) does.
+    """
+
+    _CATALOG, _PAGES, _FIRST_FREE = 1, 2, 3
+
+    def __init__(self, out):
+        self._out = out
+        self._position = 0
+        self._offsets = array("Q", [0] * self._FIRST_FREE)  # index 0 is the free-list head
+        self._page_ids = array("I")
+        self._forms = {}  # name -> object number
+        self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        fonts = b" ".join(
+            code + b" " + str(self._object(b"<< /Type /Font /Subtype /Type1 /BaseFont /" + name.encode("ascii")
+                                           + b" /Encoding /WinAnsiEncoding >>")).encode("ascii") + b" 0 R"
+            for name, code in _FONTS.items()
+        )
+        self._fonts = b"/Font << " + fonts + b" >>"
+
+    @property
+    def page_count(self) -> int:
+        return len(self._page_ids)
+
+    def has_form(self, name: str) -> bool:
+        return name in self._forms
+
+    def add_form(self, name: str, content: bytes):
+        """Define a form XObject that later pages can stamp by name."""
+        self._forms[name] = self._stream(
+            b"/Type /XObject /Subtype /Form /BBox [0 0 " + _num(PAGE_WIDTH) + b" " + _num(PAGE_HEIGHT)
+            + b"] /Resources << " + self._fonts + b" >>", content)
+
+    def add_page(self, content: bytes, forms=()):
+        """Write one page: its forms (stamped in order, under `content`) and content stream."""
+        content = b"".join(b"/" + name.encode("ascii") + b" Do\n" for name in forms) + content
+        contents = self._stream(b"", content)
+        xobjects = b" ".join(b"/" + name.encode("ascii") + b" " + str(self._forms[name]).encode("ascii") + b" 0 R"
+                             for name in forms)
+        self._page_ids.append(self._object(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 " + _num(PAGE_WIDTH) + b" " + _num(PAGE_HEIGHT)
+            + b"] /Resources << " + self._fonts + b" /XObject << " + xobjects + b" >> >> /Contents "
+            + str(contents).encode("ascii") + b" 0 R >>"))
+
+    def close(self):
+        """Write the page tree, catalog, cross-reference table and trailer."""
+        self._object(b"<< /Type /Catalog /Pages 2 0 R >>", self._CATALOG)
+        self._offsets[self._PAGES] = self._position
+        self._write(b"2 0 obj\n<< /Type /Pages /Count " + str(len(self._page_ids)).encode("ascii") + b" /Kids [")
+        for page_id in self._page_ids:
+            self._write(str(page_id).encode("ascii") + b" 0 R ")
+        self._write(b"] >>\nendobj\n")
+
+        xref = self._position
+        self._write(f"xref\n0 {len(self._offsets)}\n0000000000 65535 f \n".encode("ascii"))
+        for offset in self._offsets[1:]:
+            self._write(b"%010d 00000 n \n" % offset)
+        self._write(f"trailer\n<< /Size {len(self._offsets)} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("ascii"))
+
+    def _write(self, data: bytes):
+        self._out.write(data)
+        self._position += len(data)
+
+    def _object(self, body: bytes, number=None) -> int:
+        if number is None:
+            number = len(self._offsets)
+            self._offsets.append(self._position)
+        else:
+            self._offsets[number] = self._position
+        self._write(str(number).encode("ascii") + b" 0 obj\n" + body + b"\nendobj\n")
+        return number
+
+    def _stream(self, entries: bytes, content: bytes) -> int:
+        data = zlib.compress(content)
+        return self._object(
+            b"<< " + entries + b" /Filter /FlateDecode /Length " + str(len(data)).encode("ascii")
+            + b" >>\nstream\n" + data + b"\nendstream")
+
+
+def export_to_pdf(table_data, filename, predictions=None, username=None, league=None) -> int:
+    """
+    Build the PDF into `filename`, which may be a path or a binary file object.
+    Returns the number of pages.
+
+    Pages are generated one at a time from the precompiled templates and
+    written out as soon as they're drawn, so memory stays flat however long
+    the prediction history is. The banner and each table frame are written
+    once per document as forms; a page's own stream is just its title and
+    cell text.
+    """
+    if isinstance(filename, (str, os.PathLike)):
+        with open(filename, "wb") as f:
+            return export_to_pdf(table_data, f, predictions=predictions, username=username, league=league)
+
+    writer = PdfStreamWriter(filename)
+    banner = _banner(username, league)
+    if banner:
+        writer.add_form("Banner", banner)
+    for template, title, rows in _pages(table_data, predictions):
+        frame = f"{template.name}{len(rows)}"
+        if not writer.has_form(frame):
+            writer.add_form(frame, template.frame(len(rows)))
+        forms = ("Banner", frame) if banner else (frame,)
+        writer.add_page(_title(title) + b"\n" + template.cells(rows), forms)
+    writer.close()
+    return writer.page_count
+
+
+def render_document(table_data, predictions=None, username=None, league=None):
+    """
+    Render one PDF without the cache; returns (pdf bytes, render seconds).
+    Top-level and free of app state so it can run in a worker process.
+    """
+    start = time.perf_counter()
+    buffer = io.BytesIO()
+    export_to_pdf(table_data, buffer, predictions=predictions, username=username, league=league)
+    return buffer.getvalue(), time.perf_counter() - start
+
+
+def pdf_cache_key(table_data, predictions=None, username=None, league=None) -> str:
+    canonical = json.dumps(
+        [table_data, predictions or {}, username, league],
+        sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def render_pdf(table_data, predictions=None, username=None, league=None) -> bytes:
+    """
+    Render the PDF in memory and return its bytes.
+    Identical inputs are served from the content-hash cache without reportlab.
+    """
+    global _pdf_cache_size
+    key = pdf_cache_key(table_data, predictions, username, league)
+    with _pdf_cache_lock:
+        pdf = _pdf_cache.get(key)
+        if pdf is not None:
+            _pdf_cache.move_to_end(key)
+            return pdf
+
+    buffer = io.BytesIO()
+    with span("pdf_build"):
+        export_to_pdf(table_data, buffer, predictions=predictions, username=username, league=league)
+    pdf = buffer.getvalue()
+
+    with _pdf_cache_lock:
+        if key not in _pdf_cache and len(pdf) <= PDF_CACHE_MAX_BYTES:
+            _pdf_cache[key] = pdf
+            _pdf_cache_size += len(pdf)
+            while _pdf_cache_size > PDF_CACHE_MAX_BYTES:
+                _, evicted = _pdf_cache.popitem(last=False)
+                _pdf_cache_size -= len(evicted)
+    return pdf
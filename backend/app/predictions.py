@@ -1,14 +1,10 @@
-league_progress = {} 
-
-def parse_predictions(matches, predictions_json, league: str):
+def parse_predictions(matches, predictions_json, errors=None):
     """
     matches: list of (home, away) tuples
     predictions_json: dict of "Home_vs_Away": "score-score"
-    league: str ("UCL" or "UEL" or "UCFL")
+    Returns {(home, away): (home_score, away_score)} for every match.
+    If `errors` is a list, a message is appended for each unparseable score.
     """
-    if league not in league_progress:
-        league_progress[league] = {}
-
     parsed = {}
     for home, away in matches:
         key = f"{home}_vs_{away}"
@@ -16,12 +12,11 @@ def parse_predictions(matches, predictions_json, league: str):
             try:
                 home_score, away_score = map(int, predictions_json[key].split("-"))
                 parsed[(home, away)] = (home_score, away_score)
-            except ValueError:
+            except (ValueError, AttributeError):
                 parsed[(home, away)] = (0, 0)  # invalid → default
+                if errors is not None:
+                    errors.append(f"{key}: invalid score {predictions_json[key]!r}, using 0-0")
         else:
             parsed[(home, away)] = (0, 0)  # missing → default
 
-    # Merge into persistent storage (cumulative across matchdays)
-    league_progress[league].update(parsed)
-
-    return league_progress[league]
+    return parsed
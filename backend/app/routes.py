@@ -1,31 +1,80 @@
 from fastapi import APIRouter, HTTPException, Query, Request
-from fastapi.responses import JSONResponse, FileResponse
-from .scraping import scrape_ucl, scrape_uel, scrape_ucfl
-from .predictions import parse_predictions, league_progress
-from .league import calculate_league_table, format_table_for_frontend
-from .pdf_utils import export_to_pdf
-from .ipfs_utils import save_to_ipfs, get_latest_cid, load_from_ipfs
-import os
-from typing import Dict, Any
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from .http_cache import json_bytes, etag_for, conditional_json
+from .scraping import (
+    LEAGUE_SOURCES, scrape_league, scrape_league_async, load_cached_league, league_cache_age,
+    league_cache_written_at
+)
+from .predictions import parse_predictions
+from .pdf_utils import render_pdf
+from .ipfs_utils import (
+    save_to_ipfs_async, get_latest_cid, load_from_ipfs, load_from_ipfs_async,
+    ipfs_configured, pinned_cid, gateway_url
+)
+from .storage_backends import storage_backend
+from .upload_queue import upload_queue
+from .fixture_cache import FixtureCache
+from .scheduler import RefreshScheduler, LeaderLock
+from .cid_cache import cid_cache
+from .metrics import span, register_collector
+from .simulation import simulate_fixtures, DEFAULT_SIMULATIONS, MAX_SIMULATIONS
+from .session_store import session_store, PredictionSession
+from .snapshot import LeagueSnapshot
+from .leaderboard import leaderboards
+from .scenarios import evaluate_scenarios, MAX_SCENARIOS
+from .live_updates import LiveUpdates, register_metrics as register_live_update_metrics
+from .bulk_export import bulk_exporter
 import datetime
 import json
 
 router = APIRouter()
 
-# In-memory caches
-last_tables: Dict[str, Any] = {}
-last_predictions: Dict[str, Any] = {}
+fixture_cache = FixtureCache(
+    scrape_league, async_loader=scrape_league_async, cache_only_loader=load_cached_league,
+    build=LeagueSnapshot, source_stamp=league_cache_written_at,
+)
+refresh_scheduler = RefreshScheduler(
+    fixture_cache, LEAGUE_SOURCES, cache_age=league_cache_age, leader_lock=LeaderLock()
+)
+live_updates = LiveUpdates(fixture_cache)
+register_live_update_metrics(live_updates)
+
+@register_collector
+def _fixture_cache_metrics():
+    stats = fixture_cache.stats()
+    for result in ("hits", "stale_hits", "misses"):
+        yield ("fixture_cache_requests_total", "counter", "Fixture cache lookups by result.",
+               {"result": result}, stats[result])
+    yield ("fixture_cache_refreshes_total", "counter", "Fixture cache loader runs.",
+           {"outcome": "ok"}, stats["refreshes"])
+    yield ("fixture_cache_refreshes_total", "counter", "Fixture cache loader runs.",
+           {"outcome": "error"}, stats["refresh_errors"])
 
 # Helper Functions
-def get_matches_for_league(league: str, force_refresh: bool = False):
+def get_snapshot(league: str, force_refresh: bool = False):
+    """LeagueSnapshot for a league (empty if nothing loaded); None if the league is unknown."""
     league = league.lower()
-    if league == "ucl":
-        return scrape_ucl(force_refresh=force_refresh)
-    elif league == "uel":
-        return scrape_uel(force_refresh=force_refresh)
-    elif league == "ucfl":
-        return scrape_ucfl(force_refresh=force_refresh)
-    return None
+    if league not in LEAGUE_SOURCES:
+        return None
+    if force_refresh:
+        snapshot = fixture_cache.refresh(league)
+    else:
+        snapshot = fixture_cache.get(league)
+    return snapshot or LeagueSnapshot.empty(league)
+
+async def get_snapshot_async(league: str, force_refresh: bool = False):
+    league = league.lower()
+    if league not in LEAGUE_SOURCES:
+        return None
+    if force_refresh:
+        snapshot = await fixture_cache.arefresh(league)
+    else:
+        snapshot = await fixture_cache.aget(league)
+    return snapshot or LeagueSnapshot.empty(league)
+
+def new_session(snapshot: LeagueSnapshot) -> PredictionSession:
+    """A prediction session seeded with the real results."""
+    return PredictionSession(dict(snapshot.real_results), league_table=snapshot.new_table())
 
 def apply_real_results(matches_by_day):
     """Extract all played matches from scraped data"""
@@ -36,43 +85,65 @@ def apply_real_results(matches_by_day):
                 results[(g["home"], g["away"])] = (g["home_score"], g["away_score"])
     return results
 
-def get_first_unplayed_matchday(matches_by_day):
-    """Find the first matchday that has at least one unplayed match"""
-    for matchday in sorted(matches_by_day.keys(), key=lambda x: int(x)):
-        if not all(m["played"] for m in matches_by_day[matchday]):
-            return matchday
-    return None
+class MatchesView:
+    """The /matches response for one snapshot and pinned CID, serialized once."""
+    __slots__ = ("snapshot", "cid", "body", "etag")
+
+    def __init__(self, snapshot: LeagueSnapshot, cid):
+        self.snapshot = snapshot
+        self.cid = cid
+        self.body = json_bytes({
+            "league": snapshot.league,
+            "completed_table": snapshot.baseline_rows,
+            "next_matchdays": dict(snapshot.unplayed_matchdays),
+            "first_unplayed_matchday": snapshot.first_unplayed_matchday,
+            "played_results": dict(snapshot.played_results),
+            "total_matchdays": snapshot.total_matchdays,
+            "played_matchdays": snapshot.played_matchdays,
+            "ipfs_cid": cid
+        })
+        self.etag = etag_for(self.body)
+
+_matches_views = {}  # league_upper -> MatchesView
+
+def get_matches_view(snapshot: LeagueSnapshot) -> MatchesView:
+    """Reuse the view until the fixture cache swaps in a new snapshot or a new CID is pinned."""
+    cid = get_latest_cid(f"{snapshot.league}_matches")
+    view = _matches_views.get(snapshot.league)
+    if view is None or view.snapshot is not snapshot or view.cid != cid:
+        view = _matches_views[snapshot.league] = MatchesView(snapshot, cid)
+    return view
 
 # API Endpoints
 @router.get("/matches/{league}")
-def get_matches(league: str):
+async def get_matches(request: Request, league: str, username: str = Query(None)):
     print(f"== Fetching matches for {league} ==")
-    matches_by_day = get_matches_for_league(league)
-    if matches_by_day is None:
+    snapshot = await get_snapshot_async(league)
+    if snapshot is None:
         return JSONResponse({"error": "Invalid league."}, status_code=400)
 
-    league_upper = league.upper()
-    real_results = apply_real_results(matches_by_day)
-    league_progress[league_upper] = real_results
-
-    table_dict = calculate_league_table(matches_by_day, real_results)
-    table_array = format_table_for_frontend(table_dict)
-
-    first_unplayed = get_first_unplayed_matchday(matches_by_day)
-    unplayed = {day: g for day, g in matches_by_day.items() if not all(m["played"] for m in g)}
-
-    latest_cid = get_latest_cid(f"{league_upper}_matches")
-
-    return {
-        "league": league_upper,
-        "completed_table": table_array,
-        "next_matchdays": unplayed,
-        "first_unplayed_matchday": first_unplayed,
-        "played_results": {f"{h}_{a}": s for (h, a), s in real_results.items()},
-        "total_matchdays": len(matches_by_day),
-        "played_matchdays": len(matches_by_day) - len(unplayed),
-        "ipfs_cid": latest_cid
-    }
+    view = get_matches_view(snapshot)
+    if username:
+        # Loading a league starts the user's prediction run from the real results
+        session_store.reset(username, snapshot.league, new_session(snapshot))
+
+    return conditional_json(request, view.body, view.etag)
+
+@router.get("/stream/{league}")
+async def stream_updates(request: Request, league: str):
+    """
+    Server-Sent Events: a `hello` frame, then an `update` frame with the
+    changed fixtures and table rows whenever the league's data changes, or
+    `resync` when the client should refetch /matches instead.
+    """
+    snapshot = await get_snapshot_async(league)
+    if snapshot is None:
+        return JSONResponse({"error": "Invalid league."}, status_code=400)
+    frames = live_updates.stream(league.lower(), snapshot, request.headers.get("last-event-id"))
+    return StreamingResponse(frames, media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",  # don't let nginx buffer the stream
+    })
 
 @router.post("/predict/{league}")
 def submit_predictions(league: str, payload: dict):
@@ -83,30 +154,24 @@ def submit_predictions(league: str, payload: dict):
     if not matchday or not predictions:
         return JSONResponse({"error": "Missing matchday or predictions."}, status_code=400)
 
-    matches_by_day = get_matches_for_league(league)
-    if matches_by_day is None or matchday not in matches_by_day:
+    snapshot = get_snapshot(league)
+    if snapshot is None or matchday not in snapshot.fixtures_by_day:
         return JSONResponse({"error": "Invalid league or matchday."}, status_code=400)
 
-    league_upper = league.upper()
-    if all(m["played"] for m in matches_by_day[matchday]):
+    league_upper = snapshot.league
+    if snapshot.day_complete[matchday]:
         return JSONResponse({"error": "Matchday already played."}, status_code=400)
 
-    # Ensure real result state exists
-    if league_upper not in league_progress:
-        league_progress[league_upper] = apply_real_results(matches_by_day)
-
     # Parse predictions into correct format
-    new_predictions = parse_predictions(
-        [(m["home"], m["away"]) for m in matches_by_day[matchday]],
-        predictions,
-        league_upper
-    )
-    league_progress[league_upper].update(new_predictions)
+    new_predictions = parse_predictions(snapshot.fixtures_by_day[matchday], predictions)
+
+    # Update league table (only the fixtures whose score changed)
+    def apply(session):
+        with span("table_compute"):
+            return session.set_results(new_predictions)
 
-    # Update league table
-    table_dict = calculate_league_table(matches_by_day, league_progress[league_upper])
-    table_array = format_table_for_frontend(table_dict)
-    last_tables[league_upper] = table_array
+    # Creates the real result state for a new user
+    table_array = session_store.update(username, league_upper, apply, create=lambda: new_session(snapshot))
 
     return {
         "status": "saved",
@@ -115,8 +180,78 @@ def submit_predictions(league: str, payload: dict):
         "table": table_array,
     }
 
+def apply_prediction_batch(username: str, league: str, by_matchday: dict):
+    """
+    Validate and apply predictions for many matchdays of one league, then
+    compute the table once. Returns (result, applied_any); invalid matchdays
+    are reported in result["errors"] and skipped.
+    """
+    snapshot = get_snapshot(league)
+    if snapshot is None:
+        return {"error": "Invalid league."}, False
+    if not isinstance(by_matchday, dict) or not by_matchday:
+        return {"error": "Missing predictions."}, False
+
+    errors, warnings, applied, new_predictions = {}, {}, [], {}
+    for matchday, predictions in by_matchday.items():
+        matchday = str(matchday)
+        if matchday not in snapshot.fixtures_by_day:
+            errors[matchday] = "Invalid matchday."
+        elif snapshot.day_complete[matchday]:
+            errors[matchday] = "Matchday already played."
+        elif not predictions or not isinstance(predictions, dict):
+            errors[matchday] = "Missing predictions."
+        else:
+            day_warnings = []
+            new_predictions.update(
+                parse_predictions(snapshot.fixtures_by_day[matchday], predictions, day_warnings)
+            )
+            applied.append(matchday)
+            if day_warnings:
+                warnings[matchday] = day_warnings
+
+    result = {"league": snapshot.league, "matchdays": applied, "errors": errors, "warnings": warnings}
+    if not applied:
+        return result, False
+
+    def apply(session):
+        with span("table_compute"):
+            return session.set_results(new_predictions)
+
+    result["table"] = session_store.update(username, snapshot.league, apply, create=lambda: new_session(snapshot))
+    return result, True
+
+@router.post("/predict_batch")
+def submit_prediction_batch(payload: dict):
+    """
+    Predictions for many matchdays, optionally across leagues, in one request:
+    {"username": ..., "predictions": {league: {matchday: {"Home_vs_Away": "2-1"}}}}
+    Each league's table is computed once, after all its matchdays are applied.
+    """
+    username = payload.get("username", "guest")
+    by_league = payload.get("predictions")
+    if not by_league or not isinstance(by_league, dict):
+        return JSONResponse({"error": "Missing predictions."}, status_code=400)
+
+    leagues, applied_any = {}, False
+    for league, by_matchday in by_league.items():
+        leagues[league.upper()], applied = apply_prediction_batch(username, league, by_matchday)
+        applied_any = applied_any or applied
+
+    body = {"status": "saved" if applied_any else "rejected", "leagues": leagues}
+    return body if applied_any else JSONResponse(body, status_code=400)
+
+@router.post("/predict_batch/{league}")
+def submit_league_prediction_batch(league: str, payload: dict):
+    """Single-league form: {"username": ..., "predictions": {matchday: {...}}}."""
+    username = payload.get("username", "guest")
+    result, applied = apply_prediction_batch(username, league, payload.get("predictions"))
+    if not applied:
+        return JSONResponse({"status": "rejected", **result}, status_code=400)
+    return {"status": "saved", **result}
+
 @router.post("/save_predictions/{league}")
-def save_user_predictions(league: str, payload: dict):
+async def save_user_predictions(league: str, payload: dict):
     """Save ALL predictions for a user to IPFS (single file)."""
     username = payload.get("username", "guest")
     predictions = payload.get("predictions")
@@ -124,31 +259,43 @@ def save_user_predictions(league: str, payload: dict):
     if not predictions:
         return JSONResponse({"error": "Missing predictions."}, status_code=400)
 
+    if not ipfs_configured():
+        return JSONResponse({"error": "Failed to upload to IPFS"}, status_code=500)
+
     league_upper = league.upper()
     key = f"{username}_{league_upper}_all_predictions"
-
-    cid = save_to_ipfs({
+    data = {
         "username": username,
         "league": league_upper,
         "predictions": predictions,
         "timestamp": datetime.datetime.now().isoformat()
-    }, name=key)
+    }
 
-    if cid:
+    # Nothing to upload if this exact content is already pinned (and no other
+    # save is still queued that it would have to override)
+    if upload_queue.pending(key) is None and (cid := pinned_cid(data, key)):
         return {"status": "success", "cid": cid}
-    return JSONResponse({"error": "Failed to upload to IPFS"}, status_code=500)
+
+    # Rapid saves are debounced and coalesced into one background upload
+    upload_queue.submit(key, data)
+    return JSONResponse({"status": "queued", "cid": None}, status_code=202)
 
 @router.get("/load_predictions/{league}")
-def load_user_predictions(league: str, username: str = Query(...)):
+async def load_user_predictions(league: str, username: str = Query(...)):
     """Load saved predictions for a user from IPFS."""
     league_upper = league.upper()
     key = f"{username}_{league_upper}_all_predictions"
 
+    # A save still waiting in the upload queue is newer than anything pinned
+    pending = upload_queue.pending(key)
+    if pending is not None:
+        return {"status": "success", "predictions": pending.get("predictions"), "cid": None}
+
     cid = get_latest_cid(key)
     if not cid:
         return JSONResponse({"error": "No predictions found."}, status_code=404)
 
-    data = load_from_ipfs(cid)
+    data = await load_from_ipfs_async(cid)
     if data:
         return {"status": "success", "predictions": data.get("predictions"), "cid": cid}
     return JSONResponse({"error": "Failed to load data from IPFS"}, status_code=500)
@@ -158,86 +305,226 @@ def load_user_predictions(league: str, username: str = Query(...)):
 def download_pdf(league: str, payload: dict = None):
     """Download league table with optional user predictions from IPFS."""
     league_upper = league.upper()
-    if league_upper not in last_tables:
-        return JSONResponse({"error": "No data. Predict first."}, status_code=400)
-
-    # Now this is a list of dicts with keys matching the frontend
-    table_data = last_tables[league_upper]
-
     username = None
     user_predictions = {}
 
     if payload and "username" in payload:
         username = payload["username"]
 
+    session = session_store.get(username or "guest", league_upper)
+    if session is None or session.table is None:
+        return JSONResponse({"error": "No data. Predict first."}, status_code=400)
+
+    # Now this is a list of dicts with keys matching the frontend
+    table_data = session.table
+
     if username:
         key = f"{username}_{league_upper}_all_predictions"
-        cid = get_latest_cid(key)
-        if cid:
+        data = upload_queue.pending(key)
+        if data is None and (cid := get_latest_cid(key)):
             data = load_from_ipfs(cid)
-            if data:
-                user_predictions = data.get("predictions", {})
+        if data:
+            user_predictions = data.get("predictions", {})
 
     filename = f"{league_upper}_table.pdf"
-    print("DEBUG RAW TABLE DATA:", table_data)
 
-    export_to_pdf(
+    pdf = render_pdf(
         table_data,
-        filename,
         predictions=user_predictions,
         username=username,
         league=league_upper,
     )
-    return FileResponse(path=filename, filename=filename, media_type="application/pdf")
+    return Response(
+        content=pdf,
+        media_type="application/pdf",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+@router.post("/export/{league}")
+def start_bulk_export(league: str, payload: dict = None):
+    """
+    Render one PDF per participant into a zip: {"usernames": [...]}, or every
+    user with saved predictions for the league if omitted.
+    """
+    snapshot = get_snapshot(league)
+    if snapshot is None:
+        return JSONResponse({"error": "Invalid league."}, status_code=400)
+    usernames = (payload or {}).get("usernames")
+    if usernames is not None and (not isinstance(usernames, list) or not all(isinstance(u, str) for u in usernames)):
+        return JSONResponse({"error": "usernames must be a list of strings."}, status_code=400)
+
+    try:
+        job = bulk_exporter.start(snapshot, usernames)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    return JSONResponse({
+        "job": job,
+        "status_url": f"/api/export/jobs/{job['id']}",
+        "download_url": f"/api/export/jobs/{job['id']}/download",
+    }, status_code=202)
+
+@router.get("/export/jobs/{job_id}")
+def bulk_export_status(job_id: str):
+    """Progress and per-document render times of an export job."""
+    job = bulk_exporter.status(job_id)
+    if job is None:
+        return JSONResponse({"error": "Unknown export job."}, status_code=404)
+    return job
+
+@router.get("/export/jobs/{job_id}/download")
+def bulk_export_download(job_id: str):
+    """The job's zip; streamed as documents finish if the job is still running."""
+    job = bulk_exporter.status(job_id)
+    if job is None:
+        return JSONResponse({"error": "Unknown export job."}, status_code=404)
+    if job["status"] == "failed":
+        return JSONResponse({"error": f"Export failed: {job.get('error')}"}, status_code=409)
+    filename = f"{job['league']}_predictions_{job_id[:8]}.zip"
+    return StreamingResponse(bulk_exporter.iter_zip(job_id), media_type="application/zip",
+                             headers={"Content-Disposition": f'attachment; filename="{filename}"'})
 
 @router.post("/refresh/{league}")
-def refresh_data(league: str):
+async def refresh_data(league: str):
     """Force refresh and upload updated league data to IPFS."""
-    matches_by_day = get_matches_for_league(league, force_refresh=True)
-    if matches_by_day is None:
+    snapshot = await get_snapshot_async(league, force_refresh=True)
+    if snapshot is None:
         return JSONResponse({"error": "Invalid league."}, status_code=400)
 
-    league_upper = league.upper()
-    real_results = apply_real_results(matches_by_day)
-    league_progress[league_upper] = real_results
-
+    league_upper = snapshot.league
     ipfs_data = {
         "league": league_upper,
-        "matches_by_day": matches_by_day,
-        "played_results": {f"{h}_{a}": s for (h, a), s in real_results.items()},
+        "matches_by_day": snapshot.matches_by_day,
+        "played_results": dict(snapshot.played_results),
         "timestamp": datetime.datetime.now().isoformat()
     }
 
-    cid = save_to_ipfs(ipfs_data, name=f"{league_upper}_matches")
+    cid = await save_to_ipfs_async(ipfs_data, name=f"{league_upper}_matches")
     if cid:
         return {"status": "success", "cid": cid}
     return JSONResponse({"error": "IPFS upload failed"}, status_code=500)
 
+@router.get("/simulate/{league}")
+def simulate(
+    league: str,
+    simulations: int = Query(DEFAULT_SIMULATIONS, ge=1, le=MAX_SIMULATIONS),
+    seed: int = Query(None),
+):
+    """Monte Carlo the remaining fixtures and return finishing-position odds."""
+    snapshot = get_snapshot(league)
+    if snapshot is None:
+        return JSONResponse({"error": "Invalid league."}, status_code=400)
+
+    result = simulate_fixtures(snapshot.teams, snapshot.played_fixtures, snapshot.unplayed_fixtures,
+                               simulations=simulations, seed=seed)
+    return {"league": snapshot.league, **result}
+
+@router.post("/scenarios/{league}")
+def evaluate_what_if(league: str, payload: dict):
+    """
+    What-if standings without touching the user's session:
+    {"username": ..., "scenarios": [{"name": ..., "results": {"Home_vs_Away": "2-1"}}]}
+    Each scenario's results override the user's current predictions (or just
+    the real results if the user has none) for those fixtures only.
+    """
+    snapshot = get_snapshot(league)
+    if snapshot is None:
+        return JSONResponse({"error": "Invalid league."}, status_code=400)
+    scenarios = payload.get("scenarios")
+    if not isinstance(scenarios, list) or not scenarios:
+        return JSONResponse({"error": "Missing scenarios."}, status_code=400)
+    if len(scenarios) > MAX_SCENARIOS:
+        return JSONResponse({"error": f"At most {MAX_SCENARIOS} scenarios per request."}, status_code=400)
+
+    username = payload.get("username")
+    session = session_store.get(username, snapshot.league) if username else None
+    if session is not None:
+        base = "predictions"
+        base_results, base_arrays = session.progress, session.league_table.to_arrays()
+    else:
+        base = "results"
+        base_results, base_arrays = snapshot.real_results, snapshot.baseline_arrays
+
+    overrides, reports = [], []
+    for i, scenario in enumerate(scenarios):
+        results = scenario.get("results") if isinstance(scenario, dict) else None
+        report = {"name": scenario.get("name", str(i)) if isinstance(scenario, dict) else str(i),
+                  "errors": [], "warnings": []}
+        if not isinstance(results, dict):
+            report["errors"].append("Missing results.")
+            results = {}
+        fixtures = []
+        for key in results:
+            if key in snapshot.fixture_keys:
+                fixtures.append(snapshot.fixture_keys[key])
+            else:
+                report["errors"].append(f"{key}: unknown fixture")
+        overrides.append(parse_predictions(fixtures, results, report["warnings"]))
+        reports.append(report)
+
+    with span("scenario_compute"):
+        tables = evaluate_scenarios(base_arrays, base_results, overrides)
+
+    # Large bodies; skip FastAPI's generic encoder
+    return Response(json_bytes({
+        "league": snapshot.league,
+        "base": base,
+        "scenarios": [
+            {**report, "overrides": len(override), "table": table}
+            for report, override, table in zip(reports, overrides, tables)
+        ],
+    }), media_type="application/json")
+
+@router.get("/leaderboard/{league}")
+def get_leaderboard(
+    league: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500),
+    username: str = Query(None),
+):
+    """Pool standings: every user's saved predictions scored against the real results."""
+    snapshot = get_snapshot(league)
+    if snapshot is None:
+        return JSONResponse({"error": "Invalid league."}, status_code=400)
+
+    board = leaderboards.get(snapshot)
+    return {"league": snapshot.league, **board.page(offset, limit, username)}
+
 @router.get("/status/{league}")
-def get_status(league: str):
-    league_upper = league.upper()
-    matches_by_day = get_matches_for_league(league)
-    if matches_by_day is None:
+def get_status(request: Request, league: str, username: str = Query("guest")):
+    snapshot = get_snapshot(league)
+    if snapshot is None:
         return JSONResponse({"error": "Invalid league"}, status_code=400)
 
-    real_results = apply_real_results(matches_by_day)
-    latest_cid = get_latest_cid(f"{league_upper}_matches")
-    return {
+    league_upper = snapshot.league
+    latest_cid = get_matches_view(snapshot).cid
+    body = json_bytes({
         "league": league_upper,
-        "total_matchdays": len(matches_by_day),
-        "played_matches": len(real_results),
-        "has_predictions": league_upper in league_progress,
-        "pinata_configured": bool(os.getenv('PINATA_API_KEY')) and bool(os.getenv('PINATA_SECRET_API_KEY')),
+        "refresh": refresh_scheduler.status()["leagues"].get(league.lower()),
+        "total_matchdays": snapshot.total_matchdays,
+        "played_matches": len(snapshot.real_results),
+        "has_predictions": session_store.contains(username, league_upper),
+        "pinata_configured": ipfs_configured(),
+        "storage_backend": storage_backend.name,
         "latest_ipfs_cid": latest_cid,
-        "ipfs_url": f"https://gateway.pinata.cloud/ipfs/{latest_cid}" if latest_cid else None
-    }
+        "ipfs_url": gateway_url(latest_cid)
+    })
+    return conditional_json(request, body, etag_for(body))
+
+@router.get("/cache/stats")
+def cache_stats():
+    """Fixture and IPFS content cache hit/miss counters."""
+    return {"fixtures": fixture_cache.stats(), "ipfs": cid_cache.stats(), "uploads": upload_queue.stats(),
+            "streams": live_updates.stats()}
+
+@router.get("/scheduler")
+def scheduler_status():
+    """Last refresh time and duration per league."""
+    return refresh_scheduler.status()
 
 @router.post("/reset")
 def reset_data():
-    """Reset in-memory caches."""
-    last_tables.clear()
-    last_predictions.clear()
-    league_progress.clear()
+    """Reset per-user prediction sessions."""
+    session_store.clear()
     return {"status": "cleared"}
 
 @router.get("/health")
@@ -0,0 +1,98 @@
+import os
+import numpy as np
+from .league import STAT_KEYS
+
+MAX_SCENARIOS = int(os.getenv("MAX_SCENARIOS", "1000"))
+
+
+def _result_deltas(home_goals, away_goals):
+    """STAT_KEYS deltas of each result for the home and the away side, shape (n, 6) each."""
+    home_win = (home_goals > away_goals).astype(np.int64)
+    away_win = (home_goals < away_goals).astype(np.int64)
+    draw = (home_goals == away_goals).astype(np.int64)
+    gd = home_goals - away_goals
+    played = np.ones_like(gd)
+    home = np.stack([3 * home_win + draw, gd, played, home_win, draw, away_win], axis=1)
+    away = np.stack([3 * away_win + draw, -gd, played, away_win, draw, home_win], axis=1)
+    return home, away
+
+
+def evaluate_scenarios(base_arrays, base_results, scenarios):
+    """
+    Standings for many what-if variants of one base table, in one pass.
+
+    base_arrays:  LeagueTable.to_arrays() of the base table
+    base_results: {(home, away): (home_score, away_score)} the base table reflects
+    scenarios:    list of {(home, away): (home_score, away_score)} overrides
+
+    Every override is turned into a stats delta (its result minus the base
+    result it replaces) and scattered into a (scenarios, teams, stats) array
+    seeded with the base stats, then all scenarios are ranked with a single
+    lexsort. Returns one table per scenario, in the same row format and order
+    as LeagueTable.to_frontend() would give after applying the overrides.
+    """
+    teams, base_stats = base_arrays
+    teams = list(teams)
+    team_index = {team: i for i, team in enumerate(teams)}
+    n_base = len(teams)
+
+    # (scenario, home, away, home_score, away_score, old_home, old_away, has_old)
+    rows = []
+    # (scenario, team, position) of teams missing from the base table, in the
+    # order each scenario first mentions them
+    new_teams = []
+    for s, overrides in enumerate(scenarios):
+        seen = set()
+        for (home, away), (home_score, away_score) in overrides.items():
+            for team in (home, away):
+                if team not in team_index:
+                    team_index[team] = len(teams)
+                    teams.append(team)
+                i = team_index[team]
+                if i >= n_base and i not in seen:
+                    seen.add(i)
+                    new_teams.append((s, i, n_base + len(seen) - 1))
+            old = base_results.get((home, away))
+            rows.append((s, team_index[home], team_index[away], home_score, away_score,
+                         *(old or (0, 0)), old is not None))
+
+    n_scenarios, n_teams = len(scenarios), len(teams)
+    stats = np.zeros((n_scenarios, n_teams, len(STAT_KEYS)), dtype=np.int64)
+    stats[:, :n_base] = base_stats
+    present = np.zeros((n_scenarios, n_teams), dtype=bool)
+    present[:, :n_base] = True
+
+    if rows:
+        s, home, away, home_score, away_score, old_home, old_away, has_old = np.array(rows, dtype=np.int64).T
+        new_home_delta, new_away_delta = _result_deltas(home_score, away_score)
+        old_home_delta, old_away_delta = _result_deltas(old_home, old_away)
+        has_old = has_old[:, None]
+        np.add.at(stats, (s, home), new_home_delta - has_old * old_home_delta)
+        np.add.at(stats, (s, away), new_away_delta - has_old * old_away_delta)
+        present[s, home] = True
+        present[s, away] = True
+
+    # LeagueTable order: points, goal difference, then first-seen
+    seq = np.tile(np.arange(n_teams), (n_scenarios, 1))
+    if new_teams:
+        s, i, position = np.array(new_teams, dtype=np.int64).T
+        seq[s, i] = position
+    order = np.lexsort((seq, -stats[..., 1], -stats[..., 0]), axis=-1)
+
+    tables = []
+    for s in range(n_scenarios):
+        scenario_stats = stats[s].tolist()
+        scenario_present = present[s].tolist()
+        tables.append([
+            {
+                "team": teams[i],
+                "points": scenario_stats[i][0],
+                "gd": scenario_stats[i][1],
+                "played": scenario_stats[i][2],
+                "won": scenario_stats[i][3],
+                "draw": scenario_stats[i][4],
+                "lost": scenario_stats[i][5],
+            }
+            for i in order[s].tolist() if scenario_present[i]
+        ])
+    return tables
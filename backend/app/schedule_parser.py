@@ -0,0 +1,111 @@
+import re
+from collections import defaultdict
+from html import unescape
+
+# Compiled "selectors" for the fbref schedule table. The page is never turned
+# into a tree: the table is located in the raw text (inline or inside an HTML
+# comment, which is raw text as well) and its rows are scanned with regexes.
+_ROW_RE = re.compile(r"<tr\b([^>]*)>(.*?)</tr>", re.S | re.I)
+_CELL_RE = re.compile(r"<(th|td)\b([^>]*)>(.*?)</\1>", re.S | re.I)
+_ANCHOR_RE = re.compile(r"<a\b[^>]*>(.*?)</a>", re.S | re.I)
+_TAG_RE = re.compile(r"<[^>]*>")
+_DATA_STAT_RE = re.compile(r'data-stat\s*=\s*"([^"]*)"', re.I)
+_CLASS_RE = re.compile(r'class\s*=\s*"([^"]*)"', re.I)
+
+
+def _text(fragment: str) -> str:
+    """Equivalent of BeautifulSoup's `.text`."""
+    return unescape(_TAG_RE.sub("", fragment))
+
+
+def _stripped_text(fragment: str) -> str:
+    """Equivalent of BeautifulSoup's `.get_text(strip=True)`."""
+    return "".join(
+        piece for piece in (unescape(part).strip() for part in _TAG_RE.split(fragment)) if piece
+    )
+
+
+def _classes(attrs: str):
+    match = _CLASS_RE.search(attrs)
+    return match.group(1).split() if match else []
+
+
+def find_table(html: str, table_id: str):
+    """Return the raw `<table id=table_id>...</table>` markup, or None."""
+    needle = f'id="{table_id}"'
+    pos = html.find(needle)
+    while pos != -1:
+        start = html.rfind("<table", 0, pos)
+        if start != -1 and ">" not in html[start:pos]:
+            end = html.find("</table>", pos)
+            if end != -1:
+                return html[start:end + len("</table>")]
+        pos = html.find(needle, pos + len(needle))
+    return None
+
+
+def parse_schedule_fast(html: str, table_id: str):
+    """
+    Regex-based parse of an fbref schedule table.
+    Produces the same {matchday: [match, ...]} structure as the BeautifulSoup
+    parser; returns {} if the table or its body can't be found.
+    """
+    table = find_table(html, table_id)
+    if table is None:
+        return {}
+    body_start = table.find("<tbody")
+    body_end = table.rfind("</tbody>")
+    if body_start == -1 or body_end == -1:
+        return {}
+    tbody = table[body_start:body_end]
+
+    matches_by_day = defaultdict(list)
+    for row in _ROW_RE.finditer(tbody):
+        if "spacer" in _classes(row.group(1)):
+            continue
+
+        cells = {}
+        for cell in _CELL_RE.finditer(row.group(2)):
+            tag, attrs, inner = cell.group(1).lower(), cell.group(2), cell.group(3)
+            stat = _DATA_STAT_RE.search(attrs)
+            if not stat:
+                continue
+            # The soup parser looks the score cell up by data-stat *and* class
+            if stat.group(1) == "score" and "center" not in _classes(attrs):
+                continue
+            cells.setdefault((tag, stat.group(1)), inner)
+
+        matchday_cell = cells.get(("th", "gameweek"))
+        if not matchday_cell or not _text(matchday_cell).strip():
+            continue
+        matchday = _text(matchday_cell).strip()
+
+        def team(stat):
+            cell = cells.get(("td", stat))
+            anchor = _ANCHOR_RE.search(cell) if cell else None
+            return _stripped_text(anchor.group(1)) if anchor else ""
+
+        date_cell = cells.get(("td", "date"))
+        match_date = _stripped_text(date_cell) if date_cell else None
+
+        home_score, away_score, played = None, None, False
+        score_cell = cells.get(("td", "score"))
+        if score_cell:
+            score_text = _text(score_cell).strip()
+            if score_text:
+                score_text = score_text.replace("–", "-").replace("—", "-")
+                if "-" in score_text:
+                    parts = score_text.split("-")
+                    if len(parts) == 2:
+                        try:
+                            home_score, away_score, played = int(parts[0].strip()), int(parts[1].strip()), True
+                        except ValueError:
+                            pass
+
+        matches_by_day[matchday].append({
+            "home": team("home_team"), "away": team("away_team"),
+            "home_score": home_score, "away_score": away_score,
+            "played": played, "date": match_date
+        })
+
+    return dict(matches_by_day)
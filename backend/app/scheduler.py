@@ -0,0 +1,188 @@
+import asyncio
+import datetime
+import os
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, and no multi-worker entry point either
+    fcntl = None
+
+REFRESH_INTERVAL_SECONDS = int(os.getenv("REFRESH_INTERVAL_SECONDS", str(24 * 3600)))
+MATCHDAY_REFRESH_SECONDS = int(os.getenv("MATCHDAY_REFRESH_SECONDS", str(30 * 60)))
+RETRY_INTERVAL_SECONDS = int(os.getenv("RETRY_INTERVAL_SECONDS", str(10 * 60)))
+# How often a worker that isn't running the scheduler checks whether it can take over
+LEADER_RETRY_SECONDS = int(os.getenv("LEADER_RETRY_SECONDS", "30"))
+SCHEDULER_LOCK_PATH = os.path.join(os.getenv("CACHE_DIR", "cache"), "scheduler.lock")
+
+
+def is_matchday(matches_by_day, today=None) -> bool:
+    """True if a match dated today (or a late one from yesterday) is still unplayed."""
+    today = today or datetime.date.today()
+    dates = {today.isoformat(), (today - datetime.timedelta(days=1)).isoformat()}
+    return any(
+        m.get("date") in dates and not m.get("played")
+        for games in matches_by_day.values() for m in games
+    )
+
+
+class LeaderLock:
+    """
+    Non-blocking exclusive flock on a file, so that of several worker
+    processes on one host exactly one holds it. The OS drops the lock when
+    the holder exits, so a crashed leader is replaced on the next attempt.
+    """
+
+    def __init__(self, path=SCHEDULER_LOCK_PATH):
+        self._path = path
+        self._file = None
+
+    @property
+    def held(self) -> bool:
+        return self._file is not None
+
+    def acquire(self) -> bool:
+        if self._file is not None:
+            return True
+        os.makedirs(os.path.dirname(self._path) or ".", exist_ok=True)
+        f = open(self._path, "a+")
+        if fcntl is not None:
+            try:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                f.close()
+                return False
+        f.seek(0)
+        f.truncate()
+        f.write(str(os.getpid()))
+        f.flush()
+        self._file = f
+        return True
+
+    def release(self):
+        if self._file is not None:
+            self._file.close()  # closing drops the flock
+            self._file = None
+
+
+class RefreshScheduler:
+    """
+    Keeps the fixture cache warm so user requests never have to scrape.
+
+    On start every league is loaded in parallel (fresh on-disk caches are
+    reused). Afterwards each league is force-refreshed on its own schedule:
+    every REFRESH_INTERVAL_SECONDS normally, every MATCHDAY_REFRESH_SECONDS
+    while one of its matches is due today. While running, the cache is put in
+    passive mode, so requests are served from memory or the on-disk cache only.
+
+    With a `leader_lock`, only the worker holding it scrapes; the others stay
+    passive (following the on-disk cache) and retry the lock every
+    LEADER_RETRY_SECONDS in case the leader goes away.
+    """
+
+    def __init__(self, fixture_cache, leagues, cache_age=None, interval=REFRESH_INTERVAL_SECONDS,
+                 matchday_interval=MATCHDAY_REFRESH_SECONDS, retry_interval=RETRY_INTERVAL_SECONDS,
+                 leader_lock=None, leader_retry=LEADER_RETRY_SECONDS):
+        # cache_age(league) -> seconds since the data was scraped, or None
+        self._cache = fixture_cache
+        self._leader_lock = leader_lock
+        self._leader_retry = leader_retry
+        self._cache_age = cache_age
+        self._leagues = list(leagues)
+        self._interval = interval
+        self._matchday_interval = matchday_interval
+        self._retry_interval = retry_interval
+        self._task = None
+        self._next_due = {}
+        self._status = {league: {"last_refresh_at": None, "last_duration_seconds": None,
+                                 "last_ok": None, "next_refresh_at": None, "matchday": False}
+                        for league in self._leagues}
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        if self.running:
+            return
+        self._cache.passive = True
+        self._task = asyncio.create_task(self._run(), name="fixture-refresh-scheduler")
+
+    async def stop(self):
+        self._cache.passive = False
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        if self._leader_lock is not None:
+            self._leader_lock.release()
+
+    @property
+    def leader(self) -> bool:
+        return self.running and (self._leader_lock is None or self._leader_lock.held)
+
+    def status(self) -> dict:
+        return {
+            "running": self.running,
+            "leader": self.leader,
+            "pid": os.getpid(),
+            "interval_seconds": self._interval,
+            "matchday_interval_seconds": self._matchday_interval,
+            "leagues": {league: dict(s) for league, s in self._status.items()},
+        }
+
+    async def _run(self):
+        if self._leader_lock is not None and not self._leader_lock.acquire():
+            print(f"Worker {os.getpid()}: another worker runs the refresh scheduler, following its cache")
+            while not self._leader_lock.acquire():
+                await asyncio.sleep(self._leader_retry)
+        print(f"Worker {os.getpid()}: running the refresh scheduler")
+        # Warm-up: reuse fresh on-disk caches, scrape only what is missing/expired
+        await asyncio.gather(*(self._refresh(league, force_refresh=False) for league in self._leagues))
+        while True:
+            now = time.time()
+            due = [league for league in self._leagues if self._next_due[league] <= now]
+            if due:
+                await asyncio.gather(*(self._refresh(league, force_refresh=True) for league in due))
+                continue
+            wait = min(self._next_due.values()) - now
+            await asyncio.sleep(min(max(wait, 1), 60))
+
+    async def _refresh(self, league: str, force_refresh: bool):
+        start = time.time()
+        try:
+            data = await self._cache.arefresh(league, force_refresh=force_refresh)
+        except Exception as e:
+            print(f"Scheduled refresh failed for {league}: {e}")
+            data = None
+        finished = time.time()
+
+        ok = bool(data)
+        if ok and force_refresh and self._cache_age is not None:
+            # A failed scrape still returns the previous cache; only a rewrite during this refresh counts
+            age = self._cache_age(league)
+            ok = age is not None and age <= finished - start
+        matchday = ok and is_matchday(data.matches_by_day)
+        if not ok:
+            delay = self._retry_interval
+        elif matchday:
+            delay = self._matchday_interval
+        else:
+            delay = self._interval
+        if ok and not force_refresh and self._cache_age is not None:
+            # Warm-up may have reused an older on-disk copy; count its age
+            age = self._cache_age(league) or 0
+            delay = max(delay - age, 0)
+        self._next_due[league] = finished + delay
+
+        status = self._status[league]
+        status["last_refresh_at"] = datetime.datetime.fromtimestamp(finished).isoformat()
+        status["last_duration_seconds"] = round(finished - start, 3)
+        status["last_ok"] = ok
+        status["matchday"] = matchday
+        status["next_refresh_at"] = datetime.datetime.fromtimestamp(finished + delay).isoformat()
+        print(f"Scheduled refresh {league}: ok={ok} in {finished - start:.1f}s, next in {delay:.0f}s")
@@ -1,3 +1,5 @@
+import asyncio
+import httpx
 import requests
 from bs4 import BeautifulSoup, Comment
 from collections import defaultdict
@@ -5,9 +7,16 @@ import json
 import os
 import time
 import random
-from .ipfs_utils import save_to_ipfs, load_from_ipfs
+import struct
+from .ipfs_utils import save_to_ipfs, load_from_ipfs, save_to_ipfs_async, load_from_ipfs_async
+from .http_clients import get_session, get_async_client
+from .metrics import span, inc
+from .schedule_parser import parse_schedule_fast
+from . import cache_format
 
 CACHE_DIR = os.getenv("CACHE_DIR", "cache")
+# "fast" scans the raw HTML for the schedule table; "soup" always uses BeautifulSoup
+SCRAPE_PARSER = os.getenv("SCRAPE_PARSER", "fast")
 os.makedirs(CACHE_DIR, exist_ok=True)
 
 USER_AGENTS = [
@@ -19,9 +28,10 @@ USER_AGENTS = [
 ]
 
 def should_refresh_cache(cache_path, max_age_hours=24):
-    if not os.path.exists(cache_path):
+    written_at = cache_written_at(cache_path)
+    if written_at is None:
         return True
-    return (time.time() - os.path.getmtime(cache_path)) / 3600 > max_age_hours
+    return (time.time() - written_at) / 3600 > max_age_hours
 
 def get_random_headers():
     return {
@@ -33,16 +43,23 @@ def get_random_headers():
         "sec-ch-ua": '"Chromium";v="120"', "sec-ch-ua-mobile": "?0", "sec-ch-ua-platform": '"Windows"'
     }
 
+# The pooled sessions keep fbref cookies, so the warm-up request only has to
+# happen once per client rather than once per scrape.
+_session_warmed = False
+_async_warmed = False
+
 def fetch_with_session(url, max_retries=5):
-    session = requests.Session()
+    global _session_warmed
+    session = get_session()
     time.sleep(random.uniform(2, 4))
     
     for attempt in range(1, max_retries + 1):
         try:
             headers = get_random_headers()
-            if attempt == 1:
+            if attempt == 1 and not _session_warmed:
                 print(f"Establishing session...")
                 session.get("https://fbref.com/", headers=headers, timeout=15)
+                _session_warmed = True
                 time.sleep(random.uniform(1, 2))
             
             print(f"Attempt {attempt}/{max_retries}: Fetching...")
@@ -52,65 +69,151 @@ def fetch_with_session(url, max_retries=5):
                 print(f"Success!")
                 return response
             elif response.status_code in [403, 429]:
+                inc("upstream_errors_total", upstream="fbref", kind=str(response.status_code))
                 wait = (2 ** attempt) + random.uniform(1, 3)
                 print(f"Status {response.status_code}, waiting {wait:.1f}s...")
                 time.sleep(wait)
             else:
+                inc("upstream_errors_total", upstream="fbref", kind=str(response.status_code))
                 print(f"Unexpected status: {response.status_code}")
                 return None
         except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+            inc("upstream_errors_total", upstream="fbref", kind=type(e).__name__)
             print(f"Error: {type(e).__name__}")
             time.sleep(random.uniform(2, 4))
     
     print(f"Max retries exceeded")
     return None
 
+async def fetch_with_session_async(url, max_retries=5):
+    """Async twin of fetch_with_session: pooled httpx client, non-blocking backoff."""
+    global _async_warmed
+    client = get_async_client()
+    await asyncio.sleep(random.uniform(2, 4))
+
+    for attempt in range(1, max_retries + 1):
+        try:
+            headers = get_random_headers()
+            if attempt == 1 and not _async_warmed:
+                print(f"Establishing session...")
+                await client.get("https://fbref.com/", headers=headers, timeout=15)
+                _async_warmed = True
+                await asyncio.sleep(random.uniform(1, 2))
+
+            print(f"Attempt {attempt}/{max_retries}: Fetching...")
+            response = await client.get(url, headers=headers, timeout=20)
+
+            if response.status_code == 200:
+                print(f"Success!")
+                return response
+            elif response.status_code in [403, 429]:
+                inc("upstream_errors_total", upstream="fbref", kind=str(response.status_code))
+                wait = (2 ** attempt) + random.uniform(1, 3)
+                print(f"Status {response.status_code}, waiting {wait:.1f}s...")
+                await asyncio.sleep(wait)
+            else:
+                inc("upstream_errors_total", upstream="fbref", kind=str(response.status_code))
+                print(f"Unexpected status: {response.status_code}")
+                return None
+        except (httpx.TimeoutException, httpx.TransportError) as e:
+            inc("upstream_errors_total", upstream="fbref", kind=type(e).__name__)
+            print(f"Error: {type(e).__name__}")
+            await asyncio.sleep(random.uniform(2, 4))
+
+    print(f"Max retries exceeded")
+    return None
+
+# Errors from encoding data that isn't shaped like {matchday: [match, ...]}
+_UNENCODABLE = (cache_format.CacheFormatError, AttributeError, KeyError, TypeError, struct.error)
+
+def _legacy_json_path(cache_path):
+    return os.path.splitext(cache_path)[0] + ".json"
+
+def cache_written_at(cache_path):
+    """When the cache was written (binary header, else legacy JSON mtime); None if absent."""
+    try:
+        return cache_format.written_at(cache_path)
+    except FileNotFoundError:
+        pass
+    except (OSError, cache_format.CacheFormatError) as e:
+        print(f"Unreadable cache header {cache_path}: {e}")
+    legacy_path = _legacy_json_path(cache_path)
+    if legacy_path != cache_path and os.path.exists(legacy_path):
+        return os.path.getmtime(legacy_path)
+    return None
+
 def load_cache(cache_path):
+    """
+    Load fixtures from the binary cache, falling back to a legacy JSON cache
+    (which is converted on first read). None if neither is usable.
+    """
+    try:
+        return cache_format.load(cache_path)
+    except FileNotFoundError:
+        pass
+    except (OSError, cache_format.CacheFormatError) as e:
+        print(f"Ignoring unreadable cache {cache_path}: {e}")
+
+    legacy_path = _legacy_json_path(cache_path)
     try:
-        with open(cache_path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except:
+        with open(legacy_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
         return None
+    except (OSError, ValueError) as e:
+        print(f"Ignoring unreadable cache {legacy_path}: {e}")
+        return None
+
+    if legacy_path != cache_path and data:
+        try:
+            cache_format.save(data, cache_path, os.path.getmtime(legacy_path))
+            os.remove(legacy_path)
+        except _UNENCODABLE:
+            pass  # not fixture-shaped; stays JSON
+        except OSError as e:
+            print(f"Could not convert cache {legacy_path}: {e}")
+    return data
 
-def save_cache(data, cache_path):
+def save_cache(data, cache_path, written_at=None):
     try:
-        with open(cache_path, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        cache_format.save(data, cache_path, written_at)
         return True
-    except:
+    except _UNENCODABLE as e:
+        # Not fixture-shaped; keep it as JSON so it's still cached
+        print(f"Caching {cache_path} as JSON: {e}")
+        try:
+            cache_format.save_json(data, _legacy_json_path(cache_path))
+            if os.path.exists(cache_path):
+                os.remove(cache_path)
+            return True
+        except OSError as e:
+            print(f"Could not write cache {cache_path}: {e}")
+            return False
+    except OSError as e:
+        print(f"Could not write cache {cache_path}: {e}")
         return False
 
-def scrape_matches(url: str, cache_file: str, ipfs_name: str, force_refresh=False):
-    cache_path = os.path.join(CACHE_DIR, cache_file)
-    
-    if not force_refresh and should_refresh_cache(cache_path):
-        print(f"Cache expired, forcing refresh")
-        force_refresh = True
-    
-    # Try local cache
-    if not force_refresh and (data := load_cache(cache_path)):
-        print(f"Loading from cache: {cache_file}")
-        return data
-    
-    # Try IPFS
-    if not force_refresh and (ipfs_data := load_from_ipfs(name=ipfs_name)):
-        print(f"Loaded from IPFS")
-        save_cache(ipfs_data, cache_path)
-        return ipfs_data
-    
-    # Scrape web
-    print(f"Scraping: {url}")
-    response = fetch_with_session(url)
-    
-    if not response or response.status_code != 200:
-        print(f"Fetch failed, trying old cache...")
-        return load_cache(cache_path) or {}
-    
-    soup = BeautifulSoup(response.text, "html.parser")
-    
-    # Determine table ID
-    table_id = f"sched_2025-2026_{'882' if '882' in url else '19' if '19' in url else '8'}_2"
-    print(f"  Looking for: {table_id}")
+def get_table_id(url: str) -> str:
+    return f"sched_2025-2026_{'882' if '882' in url else '19' if '19' in url else '8'}_2"
+
+def parse_schedule(html: str, table_id: str):
+    """
+    Parse an fbref schedule page into {matchday: [match, ...]}.
+    Tries the fast text scanner first and falls back to BeautifulSoup.
+    """
+    if SCRAPE_PARSER == "fast":
+        try:
+            matches_by_day = parse_schedule_fast(html, table_id)
+        except Exception as e:
+            print(f"Fast parser failed ({e}), falling back to BeautifulSoup")
+            matches_by_day = {}
+        if matches_by_day:
+            return matches_by_day
+    return parse_schedule_soup(html, table_id)
+
+def parse_schedule_soup(html: str, table_id: str):
+    """BeautifulSoup parse of an fbref schedule page."""
+    soup = BeautifulSoup(html, "html.parser")
     
     # Find table
     table = soup.find("table", {"id": table_id})
@@ -161,7 +264,29 @@ def scrape_matches(url: str, cache_file: str, ipfs_name: str, force_refresh=Fals
             "played": played, "date": match_date
         })
     
-    matches_by_day = dict(matches_by_day)
+    return dict(matches_by_day)
+
+def _load_cached(cache_path: str, cache_file: str, force_refresh: bool):
+    """Return (force_refresh, cached_data) after checking the local cache."""
+    if not force_refresh and should_refresh_cache(cache_path):
+        print(f"Cache expired, forcing refresh")
+        force_refresh = True
+    
+    # Try local cache
+    if not force_refresh:
+        with span("cache_load"):
+            data = load_cache(cache_path)
+        if data:
+            print(f"Loading from cache: {cache_file}")
+            return force_refresh, data
+    return force_refresh, None
+
+def _parse_response(html: str, url: str, cache_path: str):
+    table_id = get_table_id(url)
+    print(f"  Looking for: {table_id}")
+    
+    with span("html_parse"):
+        matches_by_day = parse_schedule(html, table_id)
     if not matches_by_day:
         print(f"✗ No matches found")
         return {}
@@ -171,6 +296,52 @@ def scrape_matches(url: str, cache_file: str, ipfs_name: str, force_refresh=Fals
     print(f"✓ Found {played_count}/{total} played matches")
     
     save_cache(matches_by_day, cache_path)
+    return matches_by_day
+
+def load_cached_matches(cache_file: str, ipfs_name: str):
+    """Best available copy from the local cache or IPFS, however old; never scrapes."""
+    cache_path = os.path.join(CACHE_DIR, cache_file)
+    with span("cache_load"):
+        data = load_cache(cache_path)
+    if data:
+        return data
+    if ipfs_data := load_from_ipfs(name=ipfs_name):
+        print(f"Loaded from IPFS")
+        save_cache(ipfs_data, cache_path)
+        return ipfs_data
+    return {}
+
+def cache_age_seconds(cache_file: str):
+    """Age of the on-disk cache, or None if there isn't one."""
+    written_at = cache_written_at(os.path.join(CACHE_DIR, cache_file))
+    return None if written_at is None else time.time() - written_at
+
+def scrape_matches(url: str, cache_file: str, ipfs_name: str, force_refresh=False):
+    cache_path = os.path.join(CACHE_DIR, cache_file)
+    
+    force_refresh, data = _load_cached(cache_path, cache_file, force_refresh)
+    if data:
+        return data
+    
+    # Try IPFS
+    if not force_refresh and (ipfs_data := load_from_ipfs(name=ipfs_name)):
+        print(f"Loaded from IPFS")
+        save_cache(ipfs_data, cache_path)
+        return ipfs_data
+    
+    # Scrape web
+    print(f"Scraping: {url}")
+    with span("scrape_fetch"):
+        response = fetch_with_session(url)
+    
+    if not response or response.status_code != 200:
+        print(f"Fetch failed, trying old cache...")
+        return load_cache(cache_path) or {}
+    
+    matches_by_day = _parse_response(response.text, url, cache_path)
+    if not matches_by_day:
+        return {}
+    
     try:
         cid = save_to_ipfs(matches_by_day, name=ipfs_name)
         if cid:
@@ -180,17 +351,72 @@ def scrape_matches(url: str, cache_file: str, ipfs_name: str, force_refresh=Fals
     
     return matches_by_day
 
+async def scrape_matches_async(url: str, cache_file: str, ipfs_name: str, force_refresh=False):
+    """Async twin of scrape_matches; HTML parsing runs in a worker thread."""
+    cache_path = os.path.join(CACHE_DIR, cache_file)
+    
+    force_refresh, data = _load_cached(cache_path, cache_file, force_refresh)
+    if data:
+        return data
+    
+    # Try IPFS
+    if not force_refresh and (ipfs_data := await load_from_ipfs_async(name=ipfs_name)):
+        print(f"Loaded from IPFS")
+        save_cache(ipfs_data, cache_path)
+        return ipfs_data
+    
+    # Scrape web
+    print(f"Scraping: {url}")
+    with span("scrape_fetch"):
+        response = await fetch_with_session_async(url)
+    
+    if not response or response.status_code != 200:
+        print(f"Fetch failed, trying old cache...")
+        return load_cache(cache_path) or {}
+    
+    matches_by_day = await asyncio.to_thread(_parse_response, response.text, url, cache_path)
+    if not matches_by_day:
+        return {}
+    
+    try:
+        cid = await save_to_ipfs_async(matches_by_day, name=ipfs_name)
+        if cid:
+            print(f"✓ Pushed to IPFS: {cid}")
+    except Exception as e:
+        print(f"✗ IPFS failed: {e}")
+    
+    return matches_by_day
+
+LEAGUE_SOURCES = {
+    "ucl": ("https://fbref.com/en/comps/8/schedule/Champions-League-Scores-and-Fixtures",
+            "ucl_matches.bin", "UCL_matches"),
+    "uel": ("https://fbref.com/en/comps/19/schedule/Europa-League-Scores-and-Fixtures",
+            "uel_matches.bin", "UEL_matches"),
+    "ucfl": ("https://fbref.com/en/comps/882/schedule/Conference-League-Scores-and-Fixtures",
+             "ucfl_matches.bin", "UCFL_matches"),
+}
+
+def scrape_league(league: str, force_refresh=False):
+    return scrape_matches(*LEAGUE_SOURCES[league], force_refresh)
+
+async def scrape_league_async(league: str, force_refresh=False):
+    return await scrape_matches_async(*LEAGUE_SOURCES[league], force_refresh)
+
+def load_cached_league(league: str):
+    _, cache_file, ipfs_name = LEAGUE_SOURCES[league]
+    return load_cached_matches(cache_file, ipfs_name)
+
+def league_cache_age(league: str):
+    return cache_age_seconds(LEAGUE_SOURCES[league][1])
+
+def league_cache_written_at(league: str):
+    return cache_written_at(os.path.join(CACHE_DIR, LEAGUE_SOURCES[league][1]))
+
 def scrape_ucl(force_refresh=False):
-    return scrape_matches(
-        "https://fbref.com/en/comps/8/schedule/Champions-League-Scores-and-Fixtures",
-        "ucl_matches.json", "UCL_matches", force_refresh)
+    return scrape_league("ucl", force_refresh)
 
 def scrape_uel(force_refresh=False):
-    return scrape_matches(
-        "https://fbref.com/en/comps/19/schedule/Europa-League-Scores-and-Fixtures",
-        "uel_matches.json", "UEL_matches", force_refresh)
+    return scrape_league("uel", force_refresh)
 
 def scrape_ucfl(force_refresh=False):
-    return scrape_matches(
-        "https://fbref.com/en/comps/882/schedule/Conference-League-Scores-and-Fixtures",
-        "ucfl_matches.json", "UCFL_matches", force_refresh)
\ No newline at end of file
+    return scrape_league("ucfl", force_refresh)
@@ -0,0 +1,39 @@
+import os
+import uvicorn
+
+# Production entry point: `python -m app.serve`.
+# Runs WEB_CONCURRENCY uvicorn workers (default: one per core). Prediction
+# sessions and saves still queued for upload are shared through SQLite and
+# only one worker runs the refresh scheduler (see RefreshScheduler /
+# LeaderLock); the others follow its cache. Everything else is per process:
+# the CID and PDF caches, and the counters behind /metrics and /api/cache/stats,
+# which report only the worker that answered.
+
+
+def worker_count() -> int:
+    configured = os.getenv("WEB_CONCURRENCY")
+    if configured:
+        return max(int(configured), 1)
+    return os.cpu_count() or 1
+
+
+def main():
+    workers = worker_count()
+    if workers > 1:
+        # Read by session_store and upload_queue in every worker process
+        os.environ.setdefault("SESSION_SHARED", "1")
+    # Read by bulk_export to split the cores between the workers' render pools
+    os.environ.setdefault("WEB_CONCURRENCY", str(workers))
+    print(f"Starting {workers} worker(s)")
+    uvicorn.run(
+        "app.main:app",
+        host=os.getenv("BACKEND_HOST", "0.0.0.0"),
+        port=int(os.getenv("BACKEND_PORT", "8000")),
+        workers=workers,
+        proxy_headers=True,
+        timeout_graceful_shutdown=40,  # leaves time for the upload queue flush
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from collections import OrderedDict
+from .league import LeagueTable
+
+cache_dir = os.getenv("CACHE_DIR", "cache")
+SESSION_DB_PATH = os.path.join(cache_dir, "sessions.sqlite3")
+SESSION_MAX_IN_MEMORY = int(os.getenv("SESSION_MAX_IN_MEMORY", "1000"))
+# Set by app.serve when it starts several workers
+SESSION_SHARED = os.getenv("SESSION_SHARED", "0") == "1"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    username TEXT NOT NULL,
+    league TEXT NOT NULL,
+    version TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (username, league)
+);
+"""
+
+# _write's default: overwrite whatever version is stored
+_ANY_VERSION = object()
+
+
+class PredictionSession:
+    """Prediction state for one (username, league) pair."""
+
+    __slots__ = ("progress", "table", "league_table")
+
+    def __init__(self, progress=None, table=None, league_table=None):
+        self.progress = progress if progress is not None else {}  # (home, away) -> (hs, as)
+        self.table = table  # last computed frontend table
+        # league_table, if given, must already reflect `progress`
+        self.league_table = league_table if league_table is not None else LeagueTable(self.progress)
+
+    def set_results(self, results: dict):
+        """Apply changed fixture results as deltas against the live table."""
+        for (home, away), score in results.items():
+            old_score = self.progress.get((home, away))
+            if old_score == score:
+                continue
+            self.league_table.replace(home, away, old_score, score)
+            self.progress[(home, away)] = score
+        self.table = self.league_table.to_frontend()
+        return self.table
+
+    def to_json(self):
+        return {
+            "progress": [[h, a, hs, as_] for (h, a), (hs, as_) in self.progress.items()],
+            "table": self.table,
+        }
+
+    @classmethod
+    def from_json(cls, data):
+        progress = {(h, a): (hs, as_) for h, a, hs, as_ in data.get("progress", [])}
+        return cls(progress, data.get("table"))
+
+
+class SessionStore:
+    """
+    Bounded per-user, per-league session store.
+
+    Hot sessions live in an OrderedDict used as an LRU (O(1) lookup and touch);
+    the rest live in a SQLite table. With `shared=False` (one process) the
+    table only holds sessions spilled out of the LRU. With `shared=True`
+    (several workers on one host) every change is written through, each row
+    carries a version token, and a cached session is reused only while its
+    token still matches the row, so any worker sees the latest predictions.
+    WAL mode and BEGIN IMMEDIATE let the workers share the file safely.
+    Changes go through `update()`, which only writes a session back if its
+    row still has the version that was read, and otherwise reloads it and
+    applies the change again, so concurrent saves never overwrite each other.
+    """
+
+    def __init__(self, max_sessions=SESSION_MAX_IN_MEMORY, path=SESSION_DB_PATH, shared=SESSION_SHARED):
+        self._max = max_sessions
+        self._path = path
+        self._shared = shared
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._sessions = OrderedDict()  # key -> (session, version)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn().executescript(SCHEMA)
+
+    @property
+    def shared(self) -> bool:
+        return self._shared
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self._path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, username: str, league: str, create=None):
+        """
+        Return the session for (username, league).
+        If it does not exist and `create` is given, `create()` builds the new
+        PredictionSession.
+        """
+        return self._get((username, league), create)[0]
+
+    def update(self, username: str, league: str, change, create=None):
+        """
+        Apply `change(session)` to the session for (username, league) and
+        publish it; returns what `change` returned. `create` is as for get().
+        When shared, a session another worker saved in the meantime is
+        reloaded and `change` applied again, so `change` must be idempotent.
+        """
+        key = (username, league)
+        while True:
+            session, version = self._get(key, create)
+            if session is None:
+                return None
+            result = change(session)
+            if not self._shared:
+                return result
+            with self._lock:
+                new_version = self._write(key, session, expected=version)
+                if new_version is not None:
+                    self._sessions[key] = (session, new_version)
+                    self._sessions.move_to_end(key)
+                    return result
+                # Lost the race: drop the stale copy and retry on the stored one
+                if self._sessions.get(key, (None, None))[1] == version:
+                    self._sessions.pop(key)
+
+    def _get(self, key, create):
+        with self._lock:
+            cached = self._sessions.get(key)
+            if cached is not None and (not self._shared or self._version(key) == cached[1]):
+                self._sessions.move_to_end(key)
+                return cached
+
+            while True:
+                session, version = self._restore(key)
+                if session is not None:
+                    break
+                if create is None:
+                    self._sessions.pop(key, None)
+                    return None, None
+                session = create()
+                if not self._shared:
+                    break
+                version = self._write(key, session, expected=None)
+                if version is not None:
+                    break
+                # another worker created it first; use theirs
+            self._sessions[key] = (session, version)
+            self._sessions.move_to_end(key)
+            self._evict()
+            return session, version
+
+    def reset(self, username: str, league: str, session: PredictionSession):
+        """Replace a user's session with a fresh one."""
+        key = (username, league)
+        with self._lock:
+            if self._shared:
+                version = self._write(key, session)
+            else:
+                version = None
+                self._delete(key)
+            self._sessions[key] = (session, version)
+            self._sessions.move_to_end(key)
+            self._evict()
+            return session
+
+    def contains(self, username: str, league: str) -> bool:
+        key = (username, league)
+        with self._lock:
+            if not self._shared and key in self._sessions:
+                return True
+            return self._version(key) is not None
+
+    def clear(self):
+        with self._lock:
+            self._sessions.clear()
+            self._conn().execute("DELETE FROM sessions")
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def _version(self, key):
+        row = self._conn().execute(
+            "SELECT version FROM sessions WHERE username = ? AND league = ?", key
+        ).fetchone()
+        return row[0] if row else None
+
+    def _restore(self, key):
+        row = self._conn().execute(
+            "SELECT data, version FROM sessions WHERE username = ? AND league = ?", key
+        ).fetchone()
+        if row is None:
+            return None, None
+        try:
+            session = PredictionSession.from_json(json.loads(row[0]))
+        except (ValueError, TypeError) as e:
+            print(f"Could not restore session {key}: {e}")
+            self._delete(key)
+            return None, None
+        if not self._shared:
+            self._delete(key)  # the LRU owns it again
+        return session, row[1]
+
+    def _write(self, key, session: PredictionSession, expected=_ANY_VERSION):
+        """
+        Store `session` under a new version and return it. With `expected`,
+        only if the row still has that version (None: only if there is no
+        row yet); returns None otherwise.
+        """
+        version = uuid.uuid4().hex
+        data = json.dumps(session.to_json(), ensure_ascii=False, separators=(",", ":"))
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            if expected is _ANY_VERSION:
+                cursor = conn.execute(
+                    "INSERT INTO sessions (username, league, version, data) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(username, league) DO UPDATE SET version = excluded.version, data = excluded.data",
+                    (*key, version, data),
+                )
+            elif expected is None:
+                cursor = conn.execute(
+                    "INSERT INTO sessions (username, league, version, data) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(username, league) DO NOTHING",
+                    (*key, version, data),
+                )
+            else:
+                cursor = conn.execute(
+                    "UPDATE sessions SET version = ?, data = ? WHERE username = ? AND league = ? AND version = ?",
+                    (version, data, *key, expected),
+                )
+        return version if cursor.rowcount == 1 else None
+
+    def _delete(self, key):
+        self._conn().execute("DELETE FROM sessions WHERE username = ? AND league = ?", key)
+
+    def _evict(self):
+        while len(self._sessions) > self._max:
+            key, (session, _) = self._sessions.popitem(last=False)
+            if not self._shared:
+                self._write(key, session)  # shared sessions are already in the table
+
+
+session_store = SessionStore()
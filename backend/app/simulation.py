@@ -0,0 +1,156 @@
+import numpy as np
+
+DEFAULT_SIMULATIONS = 20000
+MAX_SIMULATIONS = 200000
+BATCH_SIZE = 25000
+
+# League phase zones (36-team format): 1-8 qualify, 9-24 play-offs, 25+ out
+TOP_ZONE = 8
+PLAYOFF_ZONE = 24
+
+# Goals are sampled by inverse CDF, truncated at this many per side.
+MAX_GOALS = 10
+
+# Shrink per-team rates towards the league average until a team has
+# this many matches worth of evidence.
+PRIOR_MATCHES = 3.0
+
+
+def _team_strengths(n_teams, played_home, played_away, played_hg, played_ag):
+    """Poisson attack/defence multipliers estimated from played results."""
+    home_avg = played_hg.mean() if len(played_hg) else 1.5
+    away_avg = played_ag.mean() if len(played_ag) else 1.2
+    league_avg = max((home_avg + away_avg) / 2, 0.1)
+
+    games = np.bincount(played_home, minlength=n_teams) + np.bincount(played_away, minlength=n_teams)
+    scored = (np.bincount(played_home, played_hg, minlength=n_teams)
+              + np.bincount(played_away, played_ag, minlength=n_teams))
+    conceded = (np.bincount(played_home, played_ag, minlength=n_teams)
+                + np.bincount(played_away, played_hg, minlength=n_teams))
+
+    attack = (scored + PRIOR_MATCHES * league_avg) / ((games + PRIOR_MATCHES) * league_avg)
+    defence = (conceded + PRIOR_MATCHES * league_avg) / ((games + PRIOR_MATCHES) * league_avg)
+    return attack, defence, max(home_avg, 0.1), max(away_avg, 0.1)
+
+
+def _poisson_cdf(rates):
+    """
+    (fixtures, levels) table of P(goals <= k) for each fixture's rate.
+    Columns that every fixture has already (almost) exhausted are dropped.
+    """
+    k = np.arange(MAX_GOALS)
+    log_pmf = k[None, :] * np.log(rates)[:, None] - rates[:, None] - np.cumsum(np.log(np.maximum(k, 1)))[None, :]
+    cdf = np.cumsum(np.exp(log_pmf), axis=1).astype(np.float32)
+    levels = max(int((cdf.min(axis=0) < 1 - 1e-6).sum()), 1)
+    return cdf[:, :levels]
+
+
+def _sample_goals(rng, cdf, batch):
+    """Sample (batch, fixtures) goal counts from per-fixture CDF tables."""
+    u = rng.random((batch, cdf.shape[0]), dtype=np.float32)
+    goals = np.zeros(u.shape, dtype=np.int8)
+    for k in range(cdf.shape[1]):
+        np.add(goals, u > cdf[:, k], out=goals, casting="unsafe")
+    return goals
+
+
+def simulate_fixtures(teams, played, remaining, simulations=DEFAULT_SIMULATIONS, seed=None):
+    """
+    Monte Carlo the `remaining` fixtures on top of the `played` results.
+    Returns per-team finishing-position distributions and zone probabilities.
+
+    `played` rows are (home, away, home_goals, away_goals) and `remaining`
+    rows (home, away), with teams given as indices into `teams`.
+
+    All simulations are sampled and accumulated as NumPy arrays of shape
+    (simulations, fixtures) / (simulations, teams); Python only loops over
+    fixed-size batches to bound memory.
+    """
+    n_teams = len(teams)
+    if n_teams == 0:
+        return {"simulations": 0, "remaining_fixtures": 0, "teams": []}
+
+    played_arr = np.asarray(played, dtype=np.int64).reshape(-1, 4)
+    p_home, p_away, p_hg, p_ag = played_arr.T
+    base_points = (np.bincount(p_home, 3 * (p_hg > p_ag) + (p_hg == p_ag), minlength=n_teams)
+                   + np.bincount(p_away, 3 * (p_ag > p_hg) + (p_hg == p_ag), minlength=n_teams))
+    base_gf = np.bincount(p_home, p_hg, minlength=n_teams) + np.bincount(p_away, p_ag, minlength=n_teams)
+    base_ga = np.bincount(p_home, p_ag, minlength=n_teams) + np.bincount(p_away, p_hg, minlength=n_teams)
+
+    remaining_arr = np.asarray(remaining, dtype=np.int64).reshape(-1, 2)
+    if len(remaining_arr) == 0:
+        # Nothing left to sample: the current standings are final
+        order = np.lexsort((-base_gf, base_ga - base_gf, -base_points))
+        probabilities = np.zeros((n_teams, n_teams))
+        probabilities[order, np.arange(n_teams)] = 1.0
+        return _summary(teams, probabilities, base_points.astype(np.float64), 0, 0)
+
+    attack, defence, home_avg, away_avg = _team_strengths(n_teams, p_home, p_away, p_hg, p_ag)
+    r_home, r_away = remaining_arr.T
+    home_cdf = _poisson_cdf(home_avg * attack[r_home] * defence[r_away])
+    away_cdf = _poisson_cdf(away_avg * attack[r_away] * defence[r_home])
+
+    # Fixture -> team incidence matrices, so per-team sums are one matmul.
+    n_fixtures = len(remaining_arr)
+    home_inc = np.zeros((n_fixtures, n_teams), dtype=np.float32)
+    away_inc = np.zeros((n_fixtures, n_teams), dtype=np.float32)
+    home_inc[np.arange(n_fixtures), r_home] = 1
+    away_inc[np.arange(n_fixtures), r_away] = 1
+    diff_inc = home_inc - away_inc
+
+    rng = np.random.default_rng(seed)
+    position_counts = np.zeros((n_teams, n_teams), dtype=np.int64)
+    points_total = np.zeros(n_teams, dtype=np.float64)
+
+    done = 0
+    while done < simulations:
+        batch = min(BATCH_SIZE, simulations - done)
+        hg = _sample_goals(rng, home_cdf, batch)
+        ag = _sample_goals(rng, away_cdf, batch)
+
+        draws = (hg == ag).astype(np.float32)
+        home_win = (hg > ag).astype(np.float32)
+        away_win = 1 - home_win - draws
+        points = (base_points + (3 * home_win + draws) @ home_inc
+                  + (3 * away_win + draws) @ away_inc)
+        gd = base_gf - base_ga + (hg - ag).astype(np.float32) @ diff_inc
+        gf = base_gf + hg.astype(np.float32) @ home_inc + ag.astype(np.float32) @ away_inc
+
+        # Rank by points, then goal difference, then goals scored, then coin flip.
+        key = points * 1e6 + (gd + 500) * 1e3 + gf + rng.random((batch, n_teams), dtype=np.float32)
+        order = np.argsort(-key, axis=1)
+        positions = np.empty_like(order)
+        np.put_along_axis(positions, order, np.arange(n_teams)[None, :], axis=1)
+
+        position_counts += np.bincount(
+            (np.arange(n_teams)[None, :] * n_teams + positions).ravel(),
+            minlength=n_teams * n_teams,
+        ).reshape(n_teams, n_teams)
+        points_total += points.sum(axis=0)
+        done += batch
+
+    return _summary(teams, position_counts / simulations, points_total / simulations, simulations, n_fixtures)
+
+
+def _summary(teams, probabilities, expected_points, simulations, n_fixtures):
+    """Response body from (teams, positions) probabilities and mean points per team."""
+    n_teams = len(teams)
+    results = []
+    for i, team in enumerate(teams):
+        dist = probabilities[i]
+        results.append({
+            "team": team,
+            "expected_points": round(float(expected_points[i]), 2),
+            "expected_position": round(float(dist @ np.arange(1, n_teams + 1)), 2),
+            "position_probabilities": [round(float(p), 4) for p in dist],
+            "top8": round(float(dist[:TOP_ZONE].sum()), 4),
+            "playoff": round(float(dist[TOP_ZONE:PLAYOFF_ZONE].sum()), 4),
+            "eliminated": round(float(dist[PLAYOFF_ZONE:].sum()), 4),
+        })
+    results.sort(key=lambda r: r["expected_position"])
+
+    return {
+        "simulations": simulations,
+        "remaining_fixtures": n_fixtures,
+        "teams": results,
+    }
@@ -0,0 +1,132 @@
+import hashlib
+import json
+import sys
+from types import MappingProxyType
+import numpy as np
+from .league import LeagueTable
+
+
+def _frozen(array):
+    array.flags.writeable = False
+    return array
+
+
+class LeagueSnapshot:
+    """
+    Immutable, precomputed view of one league's scraped fixtures.
+
+    Built once whenever the fixture cache loads new data, so request handlers
+    read lookups, arrays and the baseline table from here instead of walking
+    `matches_by_day` on every call. Fixture arrays are ordered by matchday;
+    `day_slices[day]` selects a matchday's fixtures and team columns index
+    into `teams`. Unplayed fixtures have a score of -1.
+    """
+
+    __slots__ = (
+        "league", "version", "matches_by_day", "teams", "team_ids", "matchdays",
+        "home", "away", "home_score", "away_score", "matchday", "played",
+        "day_slices", "fixtures_by_day", "day_complete", "unplayed_matchdays",
+        "first_unplayed_matchday", "real_results", "played_results",
+        "played_fixtures", "unplayed_fixtures", "baseline_table", "baseline_rows",
+        "baseline_arrays", "fixture_keys",
+    )
+
+    def __init__(self, league: str, matches_by_day: dict):
+        init = lambda name, value: object.__setattr__(self, name, value)
+        init("league", league.upper())
+        # Kept as loaded for IPFS uploads; never mutated
+        init("matches_by_day", matches_by_day)
+        init("version", hashlib.sha256(
+            json.dumps(matches_by_day, sort_keys=True, separators=(",", ":")).encode("utf-8")
+        ).hexdigest()[:16])
+
+        matchdays = tuple(sorted(matches_by_day, key=int))
+        team_ids = {}
+        columns = ([], [], [], [], [], [])  # home, away, home_score, away_score, matchday, played
+        day_slices, fixtures_by_day, day_complete, unplayed = {}, {}, {}, {}
+        real_results = {}
+
+        for day_index, day in enumerate(matchdays):
+            games = matches_by_day[day]
+            start = len(columns[0])
+            pairs = []
+            for m in games:
+                home, away = sys.intern(m["home"]), sys.intern(m["away"])
+                for team in (home, away):
+                    if team not in team_ids:
+                        team_ids[team] = len(team_ids)
+                played = bool(m.get("played"))
+                if played:
+                    real_results[(home, away)] = (m["home_score"], m["away_score"])
+                for column, value in zip(columns, (
+                    team_ids[home], team_ids[away],
+                    m["home_score"] if played else -1, m["away_score"] if played else -1,
+                    day_index, played,
+                )):
+                    column.append(value)
+                pairs.append((home, away))
+            day_slices[day] = slice(start, len(columns[0]))
+            fixtures_by_day[day] = tuple(pairs)
+            day_complete[day] = all(m["played"] for m in games)
+            if not day_complete[day]:
+                unplayed[day] = games
+
+        home, away, home_score, away_score, matchday, played = (
+            _frozen(np.array(columns[0], dtype=np.int32)),
+            _frozen(np.array(columns[1], dtype=np.int32)),
+            _frozen(np.array(columns[2], dtype=np.int16)),
+            _frozen(np.array(columns[3], dtype=np.int16)),
+            _frozen(np.array(columns[4], dtype=np.int16)),
+            _frozen(np.array(columns[5], dtype=bool)),
+        )
+        init("teams", tuple(team_ids))
+        init("team_ids", MappingProxyType(team_ids))
+        init("matchdays", matchdays)
+        for name, value in (("home", home), ("away", away), ("home_score", home_score),
+                            ("away_score", away_score), ("matchday", matchday), ("played", played)):
+            init(name, value)
+        init("played_fixtures", _frozen(np.stack([
+            home[played], away[played], home_score[played], away_score[played]
+        ], axis=1).astype(np.int64)))
+        init("unplayed_fixtures", _frozen(np.stack([home[~played], away[~played]], axis=1).astype(np.int64)))
+
+        init("day_slices", MappingProxyType(day_slices))
+        init("fixtures_by_day", MappingProxyType(fixtures_by_day))
+        init("day_complete", MappingProxyType(day_complete))
+        init("unplayed_matchdays", MappingProxyType(unplayed))
+        init("first_unplayed_matchday", next(iter(unplayed), None))
+        init("real_results", MappingProxyType(real_results))
+        init("played_results", MappingProxyType(
+            {f"{h}_{a}": s for (h, a), s in real_results.items()}
+        ))
+
+        baseline = LeagueTable(real_results)
+        init("baseline_table", baseline)
+        init("baseline_rows", tuple(baseline.to_frontend()))
+        baseline_teams, baseline_stats = baseline.to_arrays()
+        init("baseline_arrays", (baseline_teams, _frozen(baseline_stats)))
+        init("fixture_keys", MappingProxyType({
+            f"{home}_vs_{away}": (home, away) for pairs in fixtures_by_day.values() for home, away in pairs
+        }))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("LeagueSnapshot is immutable")
+
+    def __len__(self):
+        return len(self.home)
+
+    @classmethod
+    def empty(cls, league: str):
+        return cls(league, {})
+
+    @property
+    def total_matchdays(self) -> int:
+        return len(self.matchdays)
+
+    @property
+    def played_matchdays(self) -> int:
+        return len(self.matchdays) - len(self.unplayed_matchdays)
+
+    def new_table(self) -> LeagueTable:
+        """A private, mutable copy of the real-results table."""
+        return self.baseline_table.copy()
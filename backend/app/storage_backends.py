@@ -0,0 +1,186 @@
+import asyncio
+import base64
+from abc import ABC, abstractmethod
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+from .http_clients import get_session, get_async_client
+
+cache_dir = os.getenv("CACHE_DIR", "cache")
+# "pinata" (default) pins through the Pinata API; "local" stores content on disk
+IPFS_BACKEND = os.getenv("IPFS_BACKEND", "pinata")
+IPFS_LOCAL_DIR = os.getenv("IPFS_LOCAL_DIR", os.path.join(cache_dir, "ipfs_store"))
+# Public URL prefix of a running local gateway (app.local_gateway), if any
+IPFS_LOCAL_GATEWAY = os.getenv("IPFS_LOCAL_GATEWAY")
+
+# CIDv1 header for JSON content (codec 0x0200) with a sha2-256 multihash
+_CID_PREFIX = bytes([0x01, 0x80, 0x04, 0x12, 0x20])
+
+
+def compute_cid(blob: bytes) -> str:
+    """Real CIDv1 (base32, json codec, sha2-256) of a blob."""
+    digest = hashlib.sha256(blob).digest()
+    return "b" + base64.b32encode(_CID_PREFIX + digest).decode("ascii").lower().rstrip("=")
+
+
+def canonical_json(content) -> bytes:
+    return json.dumps(content, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+class StorageBackend(ABC):
+    """
+    Where IPFS content is pinned and fetched from.
+
+    `pin(content, name)` stores a JSON-serializable dict and returns its CID;
+    `fetch(cid)` returns the stored dict, or None if there is no such CID.
+    Both raise on transport/storage errors. The async variants default to
+    running the sync ones in a thread.
+    """
+
+    name = "base"
+
+    @property
+    def configured(self) -> bool:
+        return True
+
+    @abstractmethod
+    def pin(self, content: dict, name: str) -> str:
+        ...
+
+    @abstractmethod
+    def fetch(self, cid: str):
+        ...
+
+    async def apin(self, content: dict, name: str) -> str:
+        return await asyncio.to_thread(self.pin, content, name)
+
+    async def afetch(self, cid: str):
+        return await asyncio.to_thread(self.fetch, cid)
+
+    def gateway_url(self, cid: str):
+        return None
+
+
+class PinataBackend(StorageBackend):
+    """Pinata's pinJSONToIPFS API plus its HTTP gateway."""
+
+    name = "pinata"
+
+    def __init__(self, api_key=None, secret_api_key=None, pin_url=None, gateway=None):
+        self.api_key = api_key or os.getenv("PINATA_API_KEY")
+        self.secret_api_key = secret_api_key or os.getenv("PINATA_SECRET_API_KEY")
+        self.pin_url = pin_url or os.getenv("PINATA_PIN_URL", "https://api.pinata.cloud/pinning/pinJSONToIPFS")
+        self.gateway = gateway or os.getenv("PINATA_GATEWAY", "https://gateway.pinata.cloud/ipfs/")
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.api_key) and bool(self.secret_api_key)
+
+    def _headers(self):
+        return {
+            "pinata_api_key": self.api_key,
+            "pinata_secret_api_key": self.secret_api_key,
+            "Content-Type": "application/json"
+        }
+
+    def _body(self, content: dict, name: str) -> dict:
+        return {
+            "pinataContent": content,
+            "pinataMetadata": {
+                "name": name,
+                "keyvalues": {
+                    "uploaded_at": datetime.utcnow().isoformat()
+                }
+            }
+        }
+
+    def pin(self, content: dict, name: str) -> str:
+        response = get_session().post(
+            self.pin_url, json=self._body(content, name), headers=self._headers(), timeout=30
+        )
+        response.raise_for_status()
+        return response.json()["IpfsHash"]
+
+    async def apin(self, content: dict, name: str) -> str:
+        response = await get_async_client().post(
+            self.pin_url, json=self._body(content, name), headers=self._headers(), timeout=30
+        )
+        response.raise_for_status()
+        return response.json()["IpfsHash"]
+
+    def fetch(self, cid: str):
+        response = get_session().get(f"{self.gateway}{cid}", timeout=15)
+        response.raise_for_status()
+        return response.json()
+
+    async def afetch(self, cid: str):
+        response = await get_async_client().get(f"{self.gateway}{cid}", timeout=15)
+        response.raise_for_status()
+        return response.json()
+
+    def gateway_url(self, cid: str):
+        return f"{self.gateway}{cid}"
+
+
+class LocalBackend(StorageBackend):
+    """
+    Content-addressed store on the local filesystem.
+
+    Content is serialized as canonical JSON and stored under its CIDv1 in a
+    directory sharded by the last two CID characters. Identical content maps
+    to the same file and every write is a temp file + atomic rename, so
+    concurrent writers (threads or processes) can't corrupt an entry.
+    """
+
+    name = "local"
+
+    def __init__(self, directory=IPFS_LOCAL_DIR, gateway=IPFS_LOCAL_GATEWAY):
+        self.directory = directory
+        self.gateway = gateway
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, cid: str) -> str:
+        if not cid.isalnum():
+            raise ValueError(f"invalid CID {cid!r}")
+        return os.path.join(self.directory, cid[-2:], f"{cid}.json")
+
+    def put_blob(self, blob: bytes) -> str:
+        cid = compute_cid(blob)
+        path = self.path(cid)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(blob)
+            os.replace(tmp_path, path)
+        return cid
+
+    def get_blob(self, cid: str):
+        try:
+            with open(self.path(cid), "rb") as f:
+                return f.read()
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def pin(self, content: dict, name: str) -> str:
+        return self.put_blob(canonical_json(content))
+
+    def fetch(self, cid: str):
+        blob = self.get_blob(cid)
+        return None if blob is None else json.loads(blob)
+
+    def gateway_url(self, cid: str):
+        return f"{self.gateway.rstrip('/')}/ipfs/{cid}" if self.gateway else None
+
+
+def make_backend(kind: str = IPFS_BACKEND) -> StorageBackend:
+    if kind == "pinata":
+        return PinataBackend()
+    if kind == "local":
+        return LocalBackend()
+    raise ValueError(f"Unknown IPFS_BACKEND {kind!r} (expected 'pinata' or 'local')")
+
+
+storage_backend = make_backend()
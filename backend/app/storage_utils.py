@@ -1,32 +1,219 @@
-import os, json
+import json
+import os
+import threading
+import uuid
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, and no multi-worker entry point either
+    fcntl = None
 
 STORAGE_DIR = "storage"
-os.makedirs(STORAGE_DIR, exist_ok=True)
+# Compact a log once it has this many entries and most of them are superseded
+PREDICTION_LOG_COMPACT_ENTRIES = int(os.getenv("PREDICTION_LOG_COMPACT_ENTRIES", "64"))
+
 
 def get_local_path(username: str, league: str):
-    return os.path.join(STORAGE_DIR, f"{username}_{league}.json")
+    return os.path.join(STORAGE_DIR, f"{username}_{league}.jsonl")
 
-def save_predictions_locally(username: str, league: str, matchday: str, predictions: list):
-    path = get_local_path(username, league)
-    data = {}
-    if os.path.exists(path):
-        with open(path, "r") as f:
-            data = json.load(f)
 
-    data[matchday] = predictions
+def _header() -> bytes:
+    """First line of every log file; a new one per file, so a replaced log is never mistaken for the old."""
+    return json.dumps({"log": uuid.uuid4().hex}).encode("ascii") + b"\n"
+
+
+def _entry(matchday: str, predictions) -> bytes:
+    return json.dumps({"matchday": matchday, "predictions": predictions},
+                      ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+def _stamp(st):
+    return st.st_ino, st.st_size, st.st_mtime_ns
+
+
+class _FoldedLog:
+    __slots__ = ("header", "stamp", "offset", "entries", "state")
+
+    def __init__(self):
+        self.header = b""
+        self.stamp = None  # (inode, size, mtime) when last folded
+        self.offset = 0  # bytes of the file already folded into state
+        self.entries = 0
+        self.state = {}  # matchday -> latest predictions
+
+
+class PredictionLog:
+    """
+    Append-only prediction log, one JSON line per save in
+    `{username}_{league}.jsonl`.
+
+    A save appends one line and fsyncs it; nothing already written is ever
+    rewritten, so a crash can at worst leave a torn last line, which readers
+    ignore and the next writer truncates. The latest entry per matchday is
+    kept in memory together with the offset folded so far: a load only
+    stats the file, and reads just the new tail if another worker process
+    appended meanwhile (each file starts with a unique header line, so a
+    compacted replacement is always re-read in full). Once a log has
+    PREDICTION_LOG_COMPACT_ENTRIES entries and more than half are
+    superseded, it is atomically replaced by one line per matchday.
+    Writers in different processes are serialized with flock. A pre-log
+    `{username}_{league}.json` is folded into a new log on first access.
+    """
+
+    def __init__(self, directory=STORAGE_DIR, compact_entries=PREDICTION_LOG_COMPACT_ENTRIES):
+        self._dir = directory
+        self._compact_entries = compact_entries
+        self._logs = {}  # (username, league) -> _FoldedLog
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _paths(self, username: str, league: str):
+        """The log, and the pre-log `{username}_{league}.json` folded into it on first access."""
+        name = f"{username}_{league}"
+        return os.path.join(self._dir, f"{name}.jsonl"), os.path.join(self._dir, f"{name}.json")
+
+    def append(self, username: str, league: str, matchday: str, predictions) -> dict:
+        """Record one matchday's predictions; returns the folded state."""
+        key = (username, league)
+        path, legacy_path = self._paths(username, league)
+        matchday = str(matchday)
+        with self._lock:
+            self._migrate(path, legacy_path)
+            with self._open_locked(path, exclusive=True) as f:
+                log, torn = self._fold(f, self._logs.get(key), path)
+                if torn:
+                    f.truncate(log.offset)
+                line = _entry(matchday, predictions)
+                if log.offset == 0:
+                    log.header = _header()
+                    line = log.header + line
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+                log.offset += len(line)
+                log.entries += 1
+                log.state[matchday] = predictions
+                log.stamp = _stamp(os.fstat(f.fileno()))
+                if log.entries >= self._compact_entries and log.entries > 2 * len(log.state):
+                    self._compact(path, log)
+            self._logs[key] = log
+            return dict(log.state)
+
+    def load(self, username: str, league: str) -> dict:
+        """Latest predictions per matchday."""
+        key = (username, league)
+        path, legacy_path = self._paths(username, league)
+        with self._lock:
+            log = self._logs.get(key)
+            if log is None:
+                self._migrate(path, legacy_path)
+            try:
+                if log is None or _stamp(os.stat(path)) != log.stamp:
+                    with self._open_locked(path, exclusive=False) as f:
+                        log, _ = self._fold(f, log, path)
+            except FileNotFoundError:
+                self._logs.pop(key, None)
+                return {}
+            self._logs[key] = log
+            return dict(log.state)
+
+    def clear(self, username: str, league: str):
+        with self._lock:
+            self._logs.pop((username, league), None)
+            for path in self._paths(username, league):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def _open_locked(self, path: str, exclusive: bool):
+        """Open and flock the log, reopening if compaction replaced the file while we waited."""
+        while True:
+            f = open(path, "a+b" if exclusive else "rb")
+            if fcntl is None:
+                return f
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                if os.stat(path).st_ino == os.fstat(f.fileno()).st_ino:
+                    return f
+            except FileNotFoundError:
+                if not exclusive:
+                    return f  # cleared: fold what this handle still sees
+            f.close()
+
+    def _fold(self, f, log, path: str):
+        """Bring `log` up to date with the file; returns it and the size of any torn last line."""
+        st = os.fstat(f.fileno())
+        if log is not None and log.offset:
+            f.seek(0)
+            if st.st_size < log.offset or f.read(len(log.header)) != log.header:
+                log = None  # a different file (compacted, or cleared and recreated)
+        if log is None:
+            log = _FoldedLog()
+        f.seek(log.offset)
+        data = f.read()
+        end = data.rfind(b"\n") + 1
+        lines = data[:end].splitlines(keepends=True)
+        if log.offset == 0 and lines and lines[0].startswith(b'{"log":'):
+            log.header = lines.pop(0)
+        for line in lines:
+            try:
+                entry = json.loads(line)
+                log.state[str(entry["matchday"])] = entry["predictions"]
+                log.entries += 1
+            except (ValueError, KeyError, TypeError):
+                print(f"Skipping corrupt entry in {path}")
+        log.offset += end
+        log.stamp = _stamp(st)
+        return log, len(data) - end
+
+    def _compact(self, path: str, log: _FoldedLog):
+        log.header = _header()
+        blob = log.header + b"".join(_entry(matchday, predictions) for matchday, predictions in log.state.items())
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(blob)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        log.stamp = _stamp(os.stat(path))
+        log.offset = len(blob)
+        log.entries = len(log.state)
+
+    def _migrate(self, path: str, legacy_path: str):
+        """Turn a pre-log JSON file into a compacted log, once."""
+        if os.path.exists(path) or not os.path.exists(legacy_path):
+            return
+        try:
+            with open(legacy_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Could not migrate {legacy_path}: {e}")
+            return
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_header() + b"".join(_entry(str(matchday), predictions) for matchday, predictions in data.items()))
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            os.link(tmp_path, path)  # unlike os.replace, never clobbers a log another worker created
+            os.remove(legacy_path)
+        except (FileExistsError, FileNotFoundError):
+            pass  # another worker migrated it first
+        finally:
+            os.remove(tmp_path)
+
+
+prediction_log = PredictionLog()
+
+
+def save_predictions_locally(username: str, league: str, matchday: str, predictions: list):
+    return prediction_log.append(username, league, matchday, predictions)
 
-    with open(path, "w") as f:
-        json.dump(data, f, indent=2)
-    return data
 
 def load_all_predictions(username: str, league: str):
-    path = get_local_path(username, league)
-    if os.path.exists(path):
-        with open(path, "r") as f:
-            return json.load(f)
-    return {}
+    return prediction_log.load(username, league)
+
 
 def clear_league_data(username: str, league: str):
-    path = get_local_path(username, league)
-    if os.path.exists(path):
-        os.remove(path)
+    prediction_log.clear(username, league)
@@ -0,0 +1,268 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from .ipfs_utils import save_to_ipfs
+from .metrics import register_collector
+from .session_store import SESSION_DB_PATH, SESSION_SHARED
+
+UPLOAD_DEBOUNCE_SECONDS = float(os.getenv("UPLOAD_DEBOUNCE_SECONDS", "2"))
+UPLOAD_MAX_DELAY_SECONDS = float(os.getenv("UPLOAD_MAX_DELAY_SECONDS", "10"))
+# Failed uploads are retried after debounce * 2^attempts seconds, at most this long apart
+UPLOAD_MAX_BACKOFF_SECONDS = float(os.getenv("UPLOAD_MAX_BACKOFF_SECONDS", "300"))
+
+# Saves not yet pinned, shared by all workers (next to the sessions table)
+PENDING_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pending_uploads (
+    name TEXT PRIMARY KEY,
+    version TEXT NOT NULL,
+    owner INTEGER NOT NULL,
+    data TEXT NOT NULL
+);
+"""
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class _Pending:
+    __slots__ = ("data", "version", "first_at", "last_at", "attempts")
+
+    def __init__(self, data, version, now, attempts=0):
+        self.data = data
+        self.version = version
+        self.first_at = now
+        self.last_at = now
+        self.attempts = attempts
+
+
+class UploadQueue:
+    """
+    Debounced, coalescing background uploader.
+
+    `submit(name, data)` returns immediately. Saves for the same name within
+    `debounce` seconds of each other collapse into one upload of the newest
+    data, sent once the name has been quiet for `debounce` seconds (or
+    `max_delay` after the first save, so constant saving still gets through).
+    A single daemon thread does the uploads. A failed upload is never
+    dropped: it stays pending (so loads keep returning it) and is retried
+    with exponential backoff, capped at `max_backoff`, until it succeeds or
+    a newer save replaces it.
+
+    With `shared=True` (several workers, see SESSION_SHARED) every save is
+    also written to a pending_uploads table in the sessions database, so
+    `pending()` on any worker sees the newest unpinned save. Whichever
+    worker's timer fires uploads the row's current data and then deletes
+    the row, unless a newer save replaced it meanwhile. `recover()` adopts
+    rows left behind by workers that died before uploading them.
+    """
+
+    def __init__(self, upload, debounce=UPLOAD_DEBOUNCE_SECONDS, max_delay=UPLOAD_MAX_DELAY_SECONDS,
+                 max_backoff=UPLOAD_MAX_BACKOFF_SECONDS, path=SESSION_DB_PATH, shared=SESSION_SHARED):
+        # upload(data, name) -> cid or None
+        self._upload = upload
+        self._debounce = debounce
+        self._max_delay = max_delay
+        self._max_backoff = max_backoff
+        self._cond = threading.Condition()
+        self._pending = {}    # name -> _Pending
+        self._uploading = {}  # name -> _Pending currently being uploaded
+        self._flushing = False
+        self._thread = None
+        self._counters = {"submitted": 0, "coalesced": 0, "uploaded": 0, "failed": 0}
+        self._path = path
+        self._shared = shared
+        self._local = threading.local()
+        if shared:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._conn().executescript(PENDING_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self._path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def submit(self, name: str, data: dict):
+        version = uuid.uuid4().hex
+        if self._shared:
+            self._conn().execute(
+                "INSERT INTO pending_uploads (name, version, owner, data) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET version = excluded.version, owner = excluded.owner, "
+                "data = excluded.data",
+                (name, version, os.getpid(), json.dumps(data, ensure_ascii=False, separators=(",", ":"))),
+            )
+        self._enqueue(name, data, version)
+
+    def _enqueue(self, name: str, data: dict, version: str):
+        now = time.monotonic()
+        with self._cond:
+            self._counters["submitted"] += 1
+            entry = self._pending.get(name)
+            if entry is None:
+                self._pending[name] = _Pending(data, version, now)
+            else:
+                self._counters["coalesced"] += 1
+                entry.data = data
+                entry.version = version
+                entry.last_at = now
+                entry.attempts = 0
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="ipfs-upload-queue", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def pending(self, name: str):
+        """Newest not-yet-uploaded data for `name` (queued or in flight), or None."""
+        if self._shared:
+            row = self._conn().execute("SELECT data FROM pending_uploads WHERE name = ?", (name,)).fetchone()
+            return json.loads(row[0]) if row else None
+        with self._cond:
+            entry = self._pending.get(name) or self._uploading.get(name)
+            return entry.data if entry is not None else None
+
+    def pending_matching(self, suffix: str) -> dict:
+        """{name: (version, data)} of every not-yet-uploaded save whose name ends with `suffix`."""
+        if self._shared:
+            rows = self._conn().execute(
+                "SELECT name, version, data FROM pending_uploads WHERE substr(name, -?) = ?",
+                (len(suffix), suffix),
+            ).fetchall()
+            return {name: (version, json.loads(data)) for name, version, data in rows}
+        with self._cond:
+            entries = {**self._uploading, **self._pending}
+            return {name: (entry.version, entry.data) for name, entry in entries.items() if name.endswith(suffix)}
+
+    def recover(self):
+        """Queue the saves of workers that exited before uploading them."""
+        if not self._shared:
+            return
+        rows = self._conn().execute("SELECT name, owner FROM pending_uploads WHERE owner != ?",
+                                    (os.getpid(),)).fetchall()
+        for name, owner in rows:
+            if _alive(owner):
+                continue
+            # Claim it; another worker may be recovering the same row
+            claimed = self._conn().execute(
+                "UPDATE pending_uploads SET owner = ? WHERE name = ? AND owner = ? RETURNING version, data",
+                (os.getpid(), name, owner),
+            ).fetchone()
+            if claimed:
+                print(f"Recovered queued upload for {name} from worker {owner}")
+                self._enqueue(name, json.loads(claimed[1]), claimed[0])
+
+    def _current(self, entry: _Pending, name: str):
+        """The row's newest (version, data), or None once another worker has uploaded it."""
+        if not self._shared:
+            return entry.version, entry.data
+        row = self._conn().execute("SELECT version, data FROM pending_uploads WHERE name = ?",
+                                   (name,)).fetchone()
+        return (row[0], json.loads(row[1])) if row else None
+
+    def _retire(self, name: str, version: str):
+        if self._shared:
+            self._conn().execute("DELETE FROM pending_uploads WHERE name = ? AND version = ?", (name, version))
+
+    def flush(self, timeout=None) -> bool:
+        """Upload everything queued now and wait for it; False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._flushing = True
+            self._cond.notify_all()
+            try:
+                while self._pending or self._uploading:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return False
+                    self._cond.wait(remaining)
+                return True
+            finally:
+                self._flushing = False
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {**self._counters, "queued": len(self._pending), "uploading": len(self._uploading),
+                    "retrying": sum(1 for entry in self._pending.values() if entry.attempts)}
+
+    def _due_at(self, entry: _Pending) -> float:
+        if entry.attempts:
+            return entry.last_at + min(self._debounce * 2 ** entry.attempts, self._max_backoff)
+        return min(entry.last_at + self._debounce, entry.first_at + self._max_delay)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    now = time.monotonic()
+                    due = [name for name, entry in self._pending.items()
+                           if self._flushing or self._due_at(entry) <= now]
+                    if due:
+                        break
+                    wait = min((self._due_at(e) for e in self._pending.values()), default=None)
+                    self._cond.wait(None if wait is None else wait - now)
+                batch = {name: self._pending.pop(name) for name in due}
+                self._uploading.update(batch)
+
+            for name, entry in batch.items():
+                cid = None
+                current = (entry.version, entry.data)
+                try:
+                    # Shared: upload the newest save, whichever worker took it
+                    current = self._current(entry, name)
+                    if current is not None:
+                        entry.version, entry.data = current
+                        cid = self._upload(entry.data, name)
+                except Exception as e:
+                    print(f"Queued upload failed for {name}: {e}")
+
+                retire = None
+                with self._cond:
+                    self._uploading.pop(name, None)
+                    if current is None:
+                        pass  # already uploaded by another worker
+                    elif cid:
+                        self._counters["uploaded"] += 1
+                        retire = entry.version
+                    elif name in self._pending:
+                        pass  # a newer save superseded this one
+                    else:
+                        self._counters["failed"] += 1
+                        if not self._flushing:
+                            self._pending[name] = _Pending(entry.data, entry.version, time.monotonic(),
+                                                           entry.attempts + 1)
+                        elif self._shared:
+                            # The row stays; recover() retries it after the restart
+                            print(f"Queued upload for {name} failed during shutdown, left for the next start")
+                        else:
+                            print(f"Queued upload for {name} failed during shutdown, save lost")
+                    self._cond.notify_all()
+                if retire is not None:
+                    try:
+                        self._retire(name, retire)
+                    except sqlite3.Error as e:
+                        print(f"Could not clear pending upload {name}: {e}")
+
+
+upload_queue = UploadQueue(save_to_ipfs)
+
+
+@register_collector
+def _upload_queue_metrics():
+    stats = upload_queue.stats()
+    for outcome in ("uploaded", "failed", "coalesced"):
+        yield ("upload_queue_saves_total", "counter", "Queued IPFS saves by outcome (failed: failed attempts).",
+               {"outcome": outcome}, stats[outcome])
+    yield ("upload_queue_depth", "gauge", "Saves waiting to be uploaded.", {}, stats["queued"])
+    yield ("upload_queue_retrying", "gauge", "Saves waiting to retry a failed upload.", {}, stats["retrying"])
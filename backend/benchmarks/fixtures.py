@@ -0,0 +1,141 @@
+"""
+fbref schedule page fixtures for the offline benchmarks.
+
+Recorded pages dropped into benchmarks/fixtures/<league>.html are used as-is.
+Otherwise a deterministic page with the same markup as the fbref schedule
+(table id, data-stat cells, spacer rows, surrounding page chrome) is
+generated, with the UEL/UCFL tables hidden inside an HTML comment the way
+fbref serves secondary tables.
+"""
+import html
+import os
+import random
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+LEAGUE_TABLES = {
+    "ucl": ("8", False),
+    "uel": ("19", True),
+    "ucfl": ("882", True),
+}
+
+URLS = {
+    "ucl": "https://fbref.com/en/comps/8/schedule/Champions-League-Scores-and-Fixtures",
+    "uel": "https://fbref.com/en/comps/19/schedule/Europa-League-Scores-and-Fixtures",
+    "ucfl": "https://fbref.com/en/comps/882/schedule/Conference-League-Scores-and-Fixtures",
+}
+
+HEADER_ROW = (
+    '<tr class="thead"><th aria-label="Round" data-stat="gameweek" scope="col">Wk</th>'
+    '<th data-stat="dayofweek">Day</th><th data-stat="date">Date</th>'
+    '<th data-stat="start_time">Time</th><th data-stat="home_team">Home</th>'
+    '<th data-stat="home_xg">xG</th><th data-stat="score">Score</th>'
+    '<th data-stat="away_xg">xG</th><th data-stat="away_team">Away</th>'
+    '<th data-stat="attendance">Attendance</th><th data-stat="venue">Venue</th>'
+    '<th data-stat="referee">Referee</th><th data-stat="match_report">Match Report</th>'
+    '<th data-stat="notes">Notes</th></tr>'
+)
+
+
+def _team_link(rng, team):
+    squad = "%08x" % rng.getrandbits(32)
+    return f'<a href="/en/squads/{squad}/{team.replace(" ", "-")}-Stats">{html.escape(team)}</a>'
+
+
+def _row(rng, matchday, date, home, away, played):
+    score = ""
+    home_xg = away_xg = attendance = ""
+    if played:
+        match_id = "%08x" % rng.getrandbits(32)
+        score = f'<a href="/en/matches/{match_id}/">{rng.randint(0, 4)}–{rng.randint(0, 3)}</a>'
+        home_xg = f"{rng.uniform(0.2, 3.0):.1f}"
+        away_xg = f"{rng.uniform(0.2, 3.0):.1f}"
+        attendance = f"{rng.randint(8000, 80000):,}"
+    return (
+        f'<tr><th scope="row" class="right " data-stat="gameweek">{matchday}</th>'
+        f'<td class="left " data-stat="dayofweek" csk="3">Wed</td>'
+        f'<td class="left " data-stat="date" csk="{date.replace("-", "")}">'
+        f'<a href="/en/matches/{date}">{date}</a></td>'
+        f'<td class="right " data-stat="start_time" csk="21:00:00">'
+        f'<span class="venuetime" data-venue-date="{date}" data-venue-time="21:00">21:00</span></td>'
+        f'<td class="right " data-stat="home_team">{_team_link(rng, home)} '
+        f'<span class="f-i f-eng" style="">eng</span></td>'
+        f'<td class="right " data-stat="home_xg">{home_xg}</td>'
+        f'<td class="center " data-stat="score">{score}</td>'
+        f'<td class="right " data-stat="away_xg">{away_xg}</td>'
+        f'<td class="left " data-stat="away_team"><span class="f-i f-esp" style="">es</span> '
+        f'{_team_link(rng, away)}</td>'
+        f'<td class="right " data-stat="attendance">{attendance}</td>'
+        f'<td class="left " data-stat="venue">Stadium {home}</td>'
+        f'<td class="left " data-stat="referee">Referee {rng.randint(1, 60)}</td>'
+        f'<td class="left " data-stat="match_report"><a href="/en/matches/x">Match Report</a></td>'
+        f'<td class="left iz" data-stat="notes"></td></tr>'
+    )
+
+
+def generate_schedule_html(league: str, n_teams=36, matchdays=8, played_matchdays=5,
+                           filler_kb=1500, seed=42) -> str:
+    comp_id, in_comment = LEAGUE_TABLES[league]
+    rng = random.Random(f"{seed}-{league}")
+    teams = [f"{league.upper()} Club {i:02d}" for i in range(n_teams)]
+    # Names that need entity handling / non-ASCII text
+    teams[:3] = ["Bodø/Glimt", "Brighton & Hove Albion", "Club Atlético Madrid"]
+
+    rows = []
+    for day in range(1, matchdays + 1):
+        rng.shuffle(teams)
+        date = f"2025-{9 + (day - 1) // 2:02d}-{(day * 7) % 27 + 1:02d}"
+        for i in range(0, n_teams, 2):
+            rows.append(_row(rng, day, date, teams[i], teams[i + 1], day <= played_matchdays))
+        rows.append('<tr class="spacer partial_table result_all"><td colspan="14"></td></tr>')
+
+    table = (
+        f'<div class="table_container" id="div_sched_2025-2026_{comp_id}_2">'
+        f'<table class="stats_table sortable min_width" id="sched_2025-2026_{comp_id}_2" '
+        f'data-cols-to-freeze=",3"><caption>Scores &amp; Fixtures Table</caption>'
+        f'<thead>{HEADER_ROW}</thead><tbody>{"".join(rows)}</tbody></table></div>'
+    )
+    if in_comment:
+        table = f'<div class="placeholder"></div>\n<!--\n{table}\n-->'
+
+    # Page chrome and unrelated tables/comments, roughly the size of a real page.
+    filler = []
+    size = 0
+    i = 0
+    while size < filler_kb * 1024:
+        block = (
+            f'<div class="section_wrapper" id="all_other_{i}"><div class="section_heading">'
+            f'<h2>Other table {i}</h2></div><div class="placeholder"></div>\n<!--\n'
+            f'<table class="stats_table" id="other_{i}"><tbody>'
+            + "".join(
+                f'<tr><th data-stat="player">Player {i}-{j}</th><td data-stat="minutes">{rng.randint(0, 90)}</td>'
+                f'<td data-stat="goals">{rng.randint(0, 3)}</td></tr>'
+                for j in range(40)
+            )
+            + "</tbody></table>\n-->\n</div>"
+        )
+        filler.append(block)
+        size += len(block)
+        i += 1
+
+    half = len(filler) // 2
+    return (
+        '<!DOCTYPE html><html data-version="klecko-" lang="en"><head><meta charset="utf-8">'
+        '<title>Scores &amp; Fixtures | FBref.com</title></head><body class="comps">'
+        '<div id="wrap"><div id="header"><nav><ul>'
+        + "".join(f'<li><a href="/en/link/{k}">Link {k}</a></li>' for k in range(200))
+        + '</ul></nav></div><div id="content" role="main">'
+        + "".join(filler[:half])
+        + f'<div class="section_wrapper" id="all_sched">{table}</div>'
+        + "".join(filler[half:])
+        + "</div></div></body></html>"
+    )
+
+
+def load_schedule_html(league: str) -> str:
+    """Recorded page if present, otherwise the generated one."""
+    path = os.path.join(FIXTURES_DIR, f"{league}.html")
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+    return generate_schedule_html(league)
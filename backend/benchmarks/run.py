@@ -0,0 +1,346 @@
+"""
+Offline benchmark suite for the backend.
+
+Runs entirely locally: fbref pages come from benchmarks/fixtures, Pinata is
+replaced by app.local_gateway served over HTTP (or, with --ipfs-backend
+local, by the in-process content-addressed store), and HTTP requests go
+straight into the ASGI app. Results are printed (or written with --output) as JSON so runs on
+different commits can be diffed.
+
+    cd backend && python -m benchmarks.run --output bench.json
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+from .fixtures import URLS, load_schedule_html
+from .legacy_pdf import export_to_pdf_legacy
+
+LEAGUES = ["ucl", "uel", "ucfl"]
+
+
+def summarize(samples):
+    samples = sorted(samples)
+    n = len(samples)
+    return {
+        "n": n,
+        "mean_ms": round(statistics.fmean(samples) * 1000, 4),
+        "median_ms": round(samples[n // 2] * 1000, 4),
+        "p95_ms": round(samples[min(n - 1, int(n * 0.95))] * 1000, 4),
+        "min_ms": round(samples[0] * 1000, 4),
+    }
+
+
+def bench(fn, repeat, warmup=1):
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+class GatewayServer:
+    """
+    app.local_gateway, the local stand-in for Pinata's pinning API and IPFS
+    gateway, served over HTTP in a background thread on a free local port,
+    optionally delaying every request by `latency` seconds.
+    """
+
+    def __init__(self, latency=0.0, host="127.0.0.1"):
+        self.latency = latency
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._socket.bind((host, 0))
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._socket.getsockname()[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        # Imported late: the app reads CACHE_DIR and the Pinata settings at import
+        import uvicorn
+        from app.local_gateway import app as gateway
+
+        async def delayed(scope, receive, send):
+            if scope["type"] == "http" and self.latency:
+                await asyncio.sleep(self.latency)
+            await gateway(scope, receive, send)
+
+        self._server = uvicorn.Server(uvicorn.Config(delayed, log_level="warning", lifespan="off"))
+        self._thread = threading.Thread(target=self._server.run, kwargs={"sockets": [self._socket]}, daemon=True)
+        self._thread.start()
+        while not self._server.started:
+            time.sleep(0.01)
+        return self
+
+    def stop(self):
+        self._server.should_exit = True
+        self._thread.join()
+
+
+class _Discard:
+    """Binary sink for PDF output, so only the builders' own memory is traced."""
+
+    def write(self, data):
+        return len(data)
+
+    def flush(self):
+        pass
+
+
+def pdf_page_count(pdf: bytes) -> int:
+    return pdf.count(b"/Type /Page") - pdf.count(b"/Type /Pages")
+
+
+def bench_pdf_builders(table_array, predictions, history_sizes, repeat):
+    """
+    Pages per second and peak traced memory of the template PDF builder
+    against the legacy platypus one, for prediction histories of each size
+    (the real matchdays repeated as often as needed).
+    """
+    from app.pdf_utils import export_to_pdf
+
+    days = list(predictions.values())
+    results = {}
+    for size in history_sizes:
+        history = {str(i + 1): days[i % len(days)] for i in range(size)}
+        for name, build in (("template", export_to_pdf), ("legacy", export_to_pdf_legacy)):
+            def render():
+                buffer = io.BytesIO()
+                build(table_array, buffer, predictions=history, username="bench", league="UCL")
+                return buffer.getvalue()
+
+            pages = pdf_page_count(render())
+            timing = bench(render, repeat, warmup=0)
+            tracemalloc.start()
+            build(table_array, _Discard(), predictions=history, username="bench", league="UCL")
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            results[f"pdf_builder[{name}]@{size}"] = {
+                **timing,
+                "pages": pages,
+                "pages_per_second": round(pages / (timing["mean_ms"] / 1000), 1),
+                "peak_memory_kb": round(peak / 1024, 1),
+            }
+    return results
+
+
+async def load_test(client, make_request, total, concurrency):
+    """Fire `total` requests with at most `concurrency` in flight."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def one(i):
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            response = await make_request(client, i)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    elapsed = time.perf_counter() - start
+    return {
+        **summarize(latencies),
+        "concurrency": concurrency,
+        "errors": errors,
+        "requests_per_sec": round(total / elapsed, 1),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args):
+    results = {}
+
+    # Import the app only after CACHE_DIR / Pinata settings point somewhere local.
+    from app import scraping
+    from app.league import calculate_league_table, format_table_for_frontend
+    from app.pdf_utils import export_to_pdf
+    from app.predictions import parse_predictions
+    from app.schedule_parser import parse_schedule_fast
+    from app.routes import apply_real_results
+
+    pages = {league: load_schedule_html(league) for league in LEAGUES}
+    matches = {}
+    for league in LEAGUES:
+        table_id = scraping.get_table_id(URLS[league])
+        matches[league] = scraping.parse_schedule(pages[league], table_id)
+        scraping.save_cache(matches[league], os.path.join(scraping.CACHE_DIR, scraping.LEAGUE_SOURCES[league][1]))
+
+    for league in LEAGUES:
+        table_id = scraping.get_table_id(URLS[league])
+        soup_result = scraping.parse_schedule_soup(pages[league], table_id)
+        fast_result = parse_schedule_fast(pages[league], table_id)
+        results[f"parse_schedule_soup[{league}]"] = {
+            **bench(lambda: scraping.parse_schedule_soup(pages[league], table_id), args.repeat_slow),
+            "page_bytes": len(pages[league]),
+        }
+        results[f"parse_schedule_fast[{league}]"] = {
+            **bench(lambda: parse_schedule_fast(pages[league], table_id), args.repeat_slow),
+            "page_bytes": len(pages[league]),
+            "identical_to_soup": fast_result == soup_result,
+        }
+
+    matches_by_day = matches["ucl"]
+    real_results = apply_real_results(matches_by_day)
+    predicted = dict(real_results)
+    for games in matches_by_day.values():
+        for m in games:
+            predicted.setdefault((m["home"], m["away"]), (1, 1))
+
+    results["calculate_league_table"] = bench(
+        lambda: calculate_league_table(matches_by_day, predicted), args.repeat)
+    table_dict = calculate_league_table(matches_by_day, predicted)
+    results["format_table_for_frontend"] = bench(
+        lambda: format_table_for_frontend(table_dict), args.repeat)
+
+    first_unplayed = min((d for d, g in matches_by_day.items() if not all(m["played"] for m in g)), key=int)
+    fixtures = [(m["home"], m["away"]) for m in matches_by_day[first_unplayed]]
+    predictions_json = {f"{h}_vs_{a}": "2-1" for h, a in fixtures}
+    results["parse_predictions"] = bench(
+        lambda: parse_predictions(fixtures, predictions_json), args.repeat)
+
+    table_array = format_table_for_frontend(table_dict)
+    user_predictions = {
+        day: {f"{m['home']}_vs_{m['away']}": "2-1" for m in games}
+        for day, games in matches_by_day.items()
+    }
+    results["export_to_pdf"] = bench(
+        lambda: export_to_pdf(table_array, io.BytesIO(), predictions=user_predictions,
+                              username="bench", league="UCL"),
+        args.repeat_slow)
+    results.update(bench_pdf_builders(table_array, user_predictions, args.pdf_history, args.repeat_slow))
+
+    results.update(asyncio.run(run_http(args, matches_by_day, first_unplayed, predictions_json)))
+    return results
+
+
+async def run_http(args, matches_by_day, matchday, predictions_json):
+    import httpx
+    from app.main import app
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Warm the fixture cache so steady-state request cost is measured.
+        await client.get("/api/matches/ucl")
+
+        async def get_matches(c, i):
+            return await c.get("/api/matches/ucl")
+
+        async def predict(c, i):
+            return await c.post("/api/predict/ucl", json={
+                "matchday": matchday,
+                "predictions": predictions_json,
+                "username": f"bench-user-{i % args.users}",
+            })
+
+        async def save(c, i):
+            return await c.post("/api/save_predictions/ucl", json={
+                "username": f"bench-user-{i % args.users}",
+                "predictions": {matchday: predictions_json},
+            })
+
+        async def load(c, i):
+            return await c.get("/api/load_predictions/ucl", params={"username": f"bench-user-{i % args.users}"})
+
+        for name, make_request in [("matches", get_matches), ("predict", predict),
+                                   ("save_predictions", save), ("load_predictions", load)]:
+            for concurrency in args.concurrency:
+                results[f"http[{name}]@{concurrency}"] = await load_test(
+                    client, make_request, args.requests, concurrency)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline backend benchmarks")
+    parser.add_argument("--output", help="write JSON results to this file")
+    parser.add_argument("--repeat", type=int, default=200, help="repetitions for fast functions")
+    parser.add_argument("--repeat-slow", type=int, default=10, help="repetitions for parse/PDF")
+    parser.add_argument("--requests", type=int, default=200, help="requests per HTTP scenario")
+    parser.add_argument("--users", type=int, default=50, help="distinct usernames in HTTP scenarios")
+    parser.add_argument("--concurrency", type=lambda s: [int(x) for x in s.split(",")],
+                        default=[1, 8, 32], help="comma-separated concurrency levels")
+    parser.add_argument("--pinata-latency", type=float, default=0.0,
+                        help="artificial latency (seconds) added by the local gateway")
+    parser.add_argument("--pdf-history", type=lambda s: [int(x) for x in s.split(",")],
+                        default=[8, 100, 1000], help="comma-separated matchday counts for the PDF builder comparison")
+    parser.add_argument("--ipfs-backend", choices=["gateway", "local"], default="gateway",
+                        help="app.local_gateway over HTTP, or the local storage backend in-process")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="bench-")
+    os.environ["CACHE_DIR"] = os.path.join(workdir, "cache")
+    gateway = None
+    if args.ipfs_backend == "local":
+        os.environ["IPFS_BACKEND"] = "local"
+    else:
+        gateway = GatewayServer(latency=args.pinata_latency)
+        os.environ["PINATA_API_KEY"] = "bench"
+        os.environ["PINATA_SECRET_API_KEY"] = "bench"
+        os.environ["PINATA_PIN_URL"] = f"{gateway.base_url}/pinning/pinJSONToIPFS"
+        os.environ["PINATA_GATEWAY"] = f"{gateway.base_url}/ipfs/"
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    if gateway is not None:
+        gateway.start()
+    cwd = os.getcwd()
+    os.chdir(workdir)
+
+    # The app logs with print(); keep the JSON output clean.
+    real_stdout = sys.stdout
+    sys.stdout = io.StringIO()
+    try:
+        started = time.time()
+        results = run(args)
+    finally:
+        sys.stdout = real_stdout
+        os.chdir(cwd)
+        if gateway is not None:
+            gateway.stop()
+
+    report = {
+        "meta": {
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "started_at": started,
+            "args": vars(args),
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -39,9 +39,11 @@ api.interceptors.response.use(
 );
 
 // Core API functions 
-export const fetchLeagueMatches = async (leagueName) => {
+export const fetchLeagueMatches = async (leagueName, username = null) => {
   try {
-    const response = await api.get(`/api/matches/${leagueName}`);
+    const response = await api.get(`/api/matches/${leagueName}`, {
+      params: username ? { username } : {},
+    });
     const data = response.data;
     return {
       league: data.league,
@@ -109,6 +111,16 @@ export const getLeagueStatus = async (leagueName) => {
   }
 };
 
+// Live updates (Server-Sent Events). onUpdate gets { fixtures, table, ... } diffs;
+// onResync means the local copy is out of date and should be refetched.
+// Returns a function that closes the stream.
+export const subscribeLeagueUpdates = (leagueName, { onUpdate, onResync } = {}) => {
+  const source = new EventSource(`${BASE_URL}/api/stream/${leagueName}`);
+  source.addEventListener("update", (event) => onUpdate?.(JSON.parse(event.data)));
+  source.addEventListener("resync", (event) => onResync?.(JSON.parse(event.data)));
+  return () => source.close();
+};
+
 // Health check 
 export const checkBackendHealth = async () => {
   try {
@@ -1,5 +1,13 @@
 import { useState, useEffect } from "react";
-import { fetchLeagueMatches, submitPredictions } from "../api/leaguesApi";
+import { fetchLeagueMatches, submitPredictions, subscribeLeagueUpdates } from "../api/leaguesApi";
+
+// Merge changed rows ({ position, ...row }) into a completed table
+const applyTableDiff = (rows, changed, removedTeams = []) => {
+  const byTeam = new Map((rows || []).map((row, index) => [row.team, { position: index + 1, row }]));
+  changed.forEach(({ position, ...row }) => byTeam.set(row.team, { position, row }));
+  removedTeams.forEach((team) => byTeam.delete(team));
+  return [...byTeam.values()].sort((a, b) => a.position - b.position).map(({ row }) => row);
+};
 
 export const useLeagueData = (league) => {
   const [matchdays, setMatchdays] = useState({});
@@ -26,7 +34,8 @@ export const useLeagueData = (league) => {
     if (!league) return;
 
     setLoading(true);
-    fetchLeagueMatches(league)
+    const username = localStorage.getItem("username") || "guest";
+    fetchLeagueMatches(league, username)
       .then((response) => {
         const data = response.next_matchdays || {};
         const filtered = Object.fromEntries(
@@ -49,10 +58,30 @@ export const useLeagueData = (league) => {
       .finally(() => setLoading(false));
   }, [league]);
 
+  // Push new real results into the completed table instead of polling
+  useEffect(() => {
+    if (!league) return;
+    return subscribeLeagueUpdates(league, {
+      onUpdate: (diff) => {
+        setInitialTable((rows) => applyTableDiff(rows, diff.table, diff.removed_teams));
+        setPlayedResultsCount(diff.played_matches);
+      },
+      // Refetch without a username so the user's prediction run isn't reset
+      onResync: () =>
+        fetchLeagueMatches(league)
+          .then((response) => {
+            setInitialTable(response.completed_table);
+            setPlayedResultsCount(Object.keys(response.played_results).length);
+          })
+          .catch((err) => console.error("Error resyncing league data:", err)),
+    });
+  }, [league]);
+
   const handlePredictions = async (formattedPredictions) => {
     if (!league) return;
     const currentMatchday = matchdayKeys[currentDayIndex];
-    const payload = { matchday: currentMatchday, predictions: formattedPredictions };
+    const username = localStorage.getItem("username") || "guest";
+    const payload = { matchday: currentMatchday, predictions: formattedPredictions, username };
 
     setLoading(true);
     try {